@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark da serialização de frontmatter
+Compara yaml.safe_dump (emissor em Python, como era antes) com
+vault_writer.dump_frontmatter (libyaml) em documentos parecidos com os
+de Pokémon, aves e livros (e em textos com tabs e caracteres de
+controle), e confere que a saída é idêntica em todos eles.
+
+Uso: python benchmarks/bench_frontmatter.py [--docs N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import vault_writer  # noqa: E402
+
+
+# --------------------------------------------------------
+# DOCUMENTOS DE EXEMPLO
+# --------------------------------------------------------
+VERSION_GROUPS = [
+    "red-blue", "yellow", "gold-silver", "crystal", "ruby-sapphire", "emerald",
+    "firered-leafgreen", "diamond-pearl", "platinum", "heartgold-soulsilver",
+    "black-white", "black-2-white-2", "x-y", "omega-ruby-alpha-sapphire",
+    "sun-moon", "ultra-sun-ultra-moon", "sword-shield", "scarlet-violet",
+]
+TYPES = [
+    "Normal", "Fire", "Water", "Electric", "Grass", "Ice", "Fighting", "Poison",
+    "Ground", "Flying", "Psychic", "Bug", "Rock", "Ghost", "Dragon", "Dark",
+    "Steel", "Fairy", "Stellar", "Unknown",
+]
+
+
+def pokemon_doc(i):
+    def moves(n, method):
+        return [
+            {"move": f"Move {method} {k}", "version_group": VERSION_GROUPS[k % len(VERSION_GROUPS)],
+             "level": (k * 3) % 100 if method == "level" else 0}
+            for k in range(n)
+        ]
+
+    return {
+        "type": "creatures",
+        "subType": "pokemon",
+        "id": i,
+        "dex_id": i,
+        "name": f"Pokémon {i}",
+        "species_name": f"Pokémon {i}",
+        "coverUrl": f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/official-artwork/{i}.png",
+        "image": f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/official-artwork/{i}.png",
+        "sprites": {"official_artwork": "https://example/a.png", "default": "https://example/b.png", "shiny": None},
+        "types": ["Fire", "Flying"],
+        "generation": "Generation I",
+        "color": "Red",
+        "category": "Flame Pokémon",
+        "habitat": "Mountain",
+        "height_m": 1.7,
+        "weight_kg": 90.5,
+        "abilities": ["Blaze", "Solar Power"],
+        "stats": {"total": 534, "hp": 78, "attack": 84, "defense": 78,
+                  "special_attack": 109, "special_defense": 85, "speed": 100},
+        "moves": {
+            "level_up": moves(400, "level"),
+            "machine": moves(900, "machine"),
+            "tutor": moves(150, "tutor"),
+            "egg": moves(60, "egg"),
+            "other": [],
+        },
+        "pokedex_entries": [
+            {"version": v, "text": "It spits fire that is hot enough to melt boulders. "
+                                   "Known to cause forest fires unintentionally — é ♀ ’."}
+            for v in VERSION_GROUPS * 2
+        ],
+        "type_effectiveness": {t: 1.0 for t in TYPES},
+        "evolution_chain": ["Charmander", "Charmeleon", "Charizard"],
+    }
+
+
+def bird_doc(i):
+    return {
+        "type": "animals",
+        "subType": "bird",
+        "id": f"spc{i:05d}",
+        "name_en": f"Rufous-bellied Thrush {i}",
+        "name_pt": "Sabiá-laranjeira",
+        "scientific_name": "Turdus rufiventris",
+        "taxonomy": {"order": "Passeriformes", "family": "Thrushes and Allies"},
+        "coverUrl": "https://inaturalist-open-data.s3.amazonaws.com/photos/123/medium.jpg",
+        "image": "https://inaturalist-open-data.s3.amazonaws.com/photos/123/medium.jpg",
+    }
+
+
+def book_doc(i):
+    title = f"The Most Disturbing Book {i}"
+    return {
+        "title": {title: None},
+        "portugueseTitle": {title: None},
+        "englishTitle": {title: None},
+        "coverUrl": {"https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/1.jpg": None},
+        "onlineRating": {"3.87": None},
+        "type": "Livros",
+        "subType": {"Terror": None},
+        "status": {"Desconhecido": None},
+        "rating": {"Desconhecido": None},
+        "autor": {"Jack Ketchum": None},
+        "editora": {"Desconhecido": None},
+        "ano": {"Desconhecido": None},
+        "país": {"Desconhecido": None},
+        "idioma": {"Desconhecido": None},
+        "era": {"Desconhecido": None},
+        "cronologia": {"Desconhecido": None},
+        "tags": ["coleção/Livros", "gênero/Terror", "autor/Jack Ketchum", "país/Desconhecido",
+                 "era/Desconhecido", "status/Desconhecido", "Rating/3.87"],
+    }
+
+
+def text_doc(i):
+    # textos colados de páginas: tabs, \r, caracteres de controle e linhas
+    # longas que pedem aspas duplas (aí o dump cai no emissor em Python)
+    line = f"Entrada {i}:\tdescrição copiada\tcom tabs e um \x07 perdido — " * 6
+    return {
+        "type": "notes",
+        "id": i,
+        "description": line,
+        "raw": line + "\r\n" + line + "\x0b fim \x1b[0m",
+        "lines": [f"{k}\t{line[:60 + k]}\x00" for k in range(5)],
+        "sem_tab": {"texto": "Linha sem nada especial, mas comprida o bastante para dobrar. " * 4},
+    }
+
+
+# --------------------------------------------------------
+# MEDIÇÃO
+# --------------------------------------------------------
+def baseline(doc):
+    return yaml.safe_dump(doc, sort_keys=False, allow_unicode=True)
+
+
+def bench(fn, docs):
+    start = time.perf_counter()
+    out_bytes = 0
+    for d in docs:
+        out = fn(d)
+        out_bytes += len(out.encode("utf-8")) if isinstance(out, str) else 0
+    return time.perf_counter() - start, out_bytes
+
+
+def bench_write(docs, tmpdir):
+    # caminho real dos importadores: render + gravação atômica
+    start = time.perf_counter()
+    for i, d in enumerate(docs):
+        vault_writer.write_if_changed(os.path.join(tmpdir, f"{i}.md"), vault_writer.render_md(d))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=20, help="documentos por tipo")
+    args = parser.parse_args()
+
+    print(f"libyaml: {yaml.__with_libyaml__} (dumper rápido: {vault_writer.FastDumper.__name__})")
+    print(f"{'doc':<10}{'safe_dump':>14}{'fast':>14}{'fast+write':>14}{'ganho':>8}{'MB':>8}")
+
+    factories = (("pokemon", pokemon_doc), ("bird", bird_doc), ("book", book_doc), ("texto", text_doc))
+    for label, factory in factories:
+        n = args.docs if label == "pokemon" else args.docs * 50
+        docs = [factory(i) for i in range(n)]
+
+        for i, d in enumerate(docs):
+            assert vault_writer.dump_frontmatter(d) == baseline(d), f"saída diferente em {label} #{i}"
+
+        t_base, size = bench(baseline, docs)
+        t_fast, _ = bench(vault_writer.dump_frontmatter, docs)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            t_write = bench_write(docs, tmpdir)
+
+        print(
+            f"{label:<10}{n / t_base:>10.0f} d/s{n / t_fast:>10.0f} d/s{n / t_write:>10.0f} d/s"
+            f"{t_base / t_fast:>7.1f}x{size / 1e6:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
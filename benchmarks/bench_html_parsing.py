@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark dos backends de parsing HTML dos scrapers
+Para cada tipo de página (lista e livro do Goodreads, classes e dragão do
+Fandom) mede o tempo por página e o pico de memória Python (tracemalloc)
+de cada backend, com a árvore inteira e com a árvore parcial, e confere
+que todos extraem os mesmos dados.
+
+Páginas salvas podem ser passadas com --pages DIR; os arquivos são
+reconhecidos pelo prefixo do nome: goodreads_list*, goodreads_book*,
+fandom_classes*, fandom_dragon* (.html). Sem --pages, usa páginas
+sintéticas com o mesmo formato.
+
+Obs.: a árvore do selectolax fica em memória C, fora do tracemalloc.
+
+Uso: python benchmarks/bench_html_parsing.py [--pages DIR] [--repeat N]
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import importlib.util
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import html_parsing  # noqa: E402
+import import_books  # noqa: E402
+import dragons  # noqa: E402
+
+
+# --------------------------------------------------------
+# PÁGINAS SINTÉTICAS
+# --------------------------------------------------------
+CHROME = (
+    '<script>window.dataLayer = [];' + "var x = 1;" * 400 + '</script>'
+    '<nav class="siteHeader">' + '<a href="/genres/x">Genre</a>' * 200 + '</nav>'
+    '<div class="sidebar">' + '<div class="ad"><span>ad</span><img src="/a.png"></div>' * 150 + '</div>'
+)
+
+
+def goodreads_list_page(n_rows=100, n_pages=12):
+    rows = "".join(
+        f'<tr itemscope><td><div class="js-tooltipTrigger tooltipTrigger elementList">'
+        f'<a class="bookTitle" href="/book/show/{i}.Book_{i}"><span itemprop="name">Book {i}</span></a>'
+        f'<a class="authorName" href="/author/show/{i}"><span itemprop="name">Author {i}</span></a>'
+        f'<span class="greyText smallText uitext"><span class="minirating">3.{i % 10}7 avg rating — 1,234 ratings</span></span>'
+        f'<img class="bookCover" src="https://i.gr-assets.com/{i}.jpg">'
+        f'<div class="communityRating">' + '<span class="star">*</span>' * 20 + '</div>'
+        f'</div></td></tr>'
+        for i in range(n_rows)
+    )
+    pagination = "".join(f'<a href="?page={p}">{p}</a>' for p in range(2, n_pages + 1))
+    return (f'<html><head>{CHROME}</head><body><table class="tableList">{rows}</table>'
+            f'<div class="pagination"><em class="current">1</em>{pagination}'
+            f'<a class="next_page" href="?page=2">next »</a></div>{CHROME}</body></html>')
+
+
+def goodreads_book_page():
+    ld = '{"@type": "Book", "name": "Book", "inLanguage": "English", "numberOfPages": 320}'
+    apollo = ('{"props": {"pageProps": {"apolloState": {"Book:1": {"__typename": "Book", '
+              '"details": {"publisher": "Leisure Books", "publicationTime": 536457600000, '
+              '"numPages": 320, "language": {"name": "English"}}}}}}}')
+    reviews = "".join(f'<article class="ReviewCard"><p>{"review text " * 60}</p></article>' for _ in range(30))
+    return (f'<html><head>{CHROME}<script type="application/ld+json">{ld}</script></head><body>'
+            f'<p data-testid="pagesFormat">320 pages, Paperback</p>'
+            f'<p data-testid="publicationInfo">First published January 1, 1987</p>'
+            f'{reviews}<script id="__NEXT_DATA__" type="application/json">{apollo}</script></body></html>')
+
+
+def fandom_classes_page(n_classes=8, per_class=25):
+    sections = "".join(
+        f'<h2><span class="mw-headline">Class {c}</span></h2><p>{"about the class " * 40}</p><ul>'
+        + "".join(f'<li><a href="/wiki/Dragon_{c}_{d}">Dragon {c} {d}</a> (Franchise)</li>' for d in range(per_class))
+        + '</ul>'
+        for c in range(n_classes)
+    )
+    return (f'<html><head>{CHROME}</head><body><div class="page-content">'
+            f'<div class="mw-parser-output">{sections}</div></div>{CHROME}</body></html>')
+
+
+def fandom_dragon_page():
+    fields = ("class", "fire type", "color", "size", "weight", "wingspan", "diet",
+              "habitat", "attack", "speed", "armor", "firepower", "shot limit", "stealth")
+    items = "".join(
+        f'<div class="pi-item pi-data" data-source="{f}"><h3 class="pi-data-label">{f.title()}</h3>'
+        f'<div class="pi-data-value">{f} value (note)</div></div>'
+        for f in fields
+    )
+    article = "".join(f'<h2>Section {i}</h2><p>{"dragon lore " * 120}</p>' for i in range(25))
+    return (f'<html><head>{CHROME}</head><body><div class="mw-parser-output">'
+            f'<aside class="portable-infobox pi-background pi-theme-wikia">'
+            f'<figure class="pi-item pi-image"><img src="https://static.wikia.nocookie.net/d.png"></figure>'
+            f'{items}</aside>{article}</div>{CHROME}</body></html>')
+
+
+# tipo de página -> (função de parsing do scraper, gerador sintético)
+PAGE_KINDS = {
+    "goodreads_list": (import_books.parse_list_page, goodreads_list_page),
+    "goodreads_book": (import_books.parse_book_details, goodreads_book_page),
+    "fandom_classes": (dragons.parse_dragon_names, fandom_classes_page),
+    "fandom_dragon": (dragons.parse_infobox, fandom_dragon_page),
+}
+
+
+def load_pages(pages_dir):
+    pages = {}
+    for kind, (_, synthetic) in PAGE_KINDS.items():
+        if pages_dir:
+            files = sorted(glob.glob(os.path.join(pages_dir, f"{kind}*.html")))
+            pages[kind] = [open(f, "rb").read() for f in files]
+        else:
+            pages[kind] = [synthetic().encode("utf-8")]
+    return pages
+
+
+# --------------------------------------------------------
+# MEDIÇÃO
+# --------------------------------------------------------
+def available_backends():
+    backends = [("html.parser", False), ("html.parser", True)]
+    if importlib.util.find_spec("lxml"):
+        backends += [("lxml", False), ("lxml", True)]
+    if importlib.util.find_spec("selectolax"):
+        backends += [("selectolax", False)]
+    return backends
+
+
+def run(fn, docs, parser, partial, repeat):
+    html_parsing.HTML_PARSER = parser
+    html_parsing.HTML_PARTIAL = partial
+
+    result = [fn(d) for d in docs]
+
+    tracemalloc.start()
+    for d in docs:
+        fn(d)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for d in docs:
+            fn(d)
+    per_page = (time.perf_counter() - start) / (repeat * len(docs))
+    return result, per_page, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", help="pasta com páginas HTML salvas")
+    parser.add_argument("--repeat", type=int, default=5, help="repetições por página")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    backends = available_backends()
+
+    print(f"{'página':<16}{'backend':<22}{'ms/pág':>9}{'pico KB':>10}{'ganho':>8}")
+    for kind, (fn, _) in PAGE_KINDS.items():
+        docs = pages[kind]
+        if not docs:
+            print(f"{kind:<16}[SKIP] nenhuma página salva")
+            continue
+
+        expected, base, _ = run(fn, docs, "html.parser", False, args.repeat)
+        for name, partial in backends:
+            result, per_page, peak = run(fn, docs, name, partial, args.repeat)
+            assert result == expected, f"{name} extraiu dados diferentes em {kind}"
+            label = f"{name}{' (parcial)' if partial else ''}"
+            print(f"{kind:<16}{label:<22}{per_page * 1e3:>9.2f}{peak / 1024:>10.0f}{base / per_page:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,53 @@
 import os
 import re
-import requests
-from bs4 import BeautifulSoup
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+import http_cache
+import html_parsing
+import metrics
+import raw_store
+import vault_writer
+from pipeline import staged_map, process_pool
+from raw_store import RawStore
+from rate_limit import RateLimiter
+from vault_index import VaultIndex, scan_summary
 
 BASE = "https://howtotrainyourdragon.fandom.com"
 CLASSES_URL = BASE + "/wiki/Dragon_Classes_(Franchise)"
 
+# modo --api: infoboxes em lote pelo api.php (pode apontar para um stand-in local)
+API_URL = os.environ.get("DRAGONS_API_URL", BASE + "/api.php")
+API_BATCH = 50  # títulos por requisição (limite do MediaWiki)
+
+VAULT_SOURCE = "dragons"  # nome da fonte no vault_index
+
 OUTPUT_FOLDER = r"C:\Users\Usuario\Documents\Gnosis\3- Bem estar\Hobbies e Inspirações\Coleções\Criaturas e seres\Dreamwork Dragons"
 
 HEADERS = {"User-Agent": "Mozilla/5.0"}
 
+MAX_WORKERS = 8
+MAX_IN_FLIGHT = MAX_WORKERS * 2
+PARSE_WORKERS = os.cpu_count() or 1  # processos para parse do HTML e render do Markdown
+MAX_QUEUED = PARSE_WORKERS * 2
+RENDER_CHUNK = 20  # dragões por tarefa no --render-only
+REQUESTS_PER_SECOND = 5  # limite para fandom.com
+
+meter = metrics.Meter(VAULT_SOURCE)
+
+# sessão com keep-alive e pool do tamanho do número de threads
+session = http_cache.CachedSession(
+    limiter=RateLimiter(REQUESTS_PER_SECOND, max_in_flight=MAX_WORKERS), meter=meter
+)
+session.headers.update(HEADERS)
+session.mount("https://", HTTPAdapter(pool_maxsize=MAX_WORKERS))
+
+# trechos das páginas que são de fato lidos (o resto nem vira árvore)
+CLASSES_PAGE_PARTS = ("div.mw-parser-output",)
+DRAGON_PAGE_PARTS = (".portable-infobox",)
+
 # -----------------------------
 # TEXT CLEANERS
 # -----------------------------
@@ -32,12 +70,16 @@ def clean_field(value):
 # -----------------------------
 def extract_dragon_names():
     print("[+] Fetching Dragon Classes page…")
-    html = requests.get(CLASSES_URL, headers=HEADERS).text
-    soup = BeautifulSoup(html, "html.parser")
+    html = session.get(CLASSES_URL).text
+    with meter.stage("parse"):
+        return parse_dragon_names(html)
+
+def parse_dragon_names(html):
+    soup = html_parsing.parse(html, only=CLASSES_PAGE_PARTS)
 
     dragon_names = set()
 
-    for header in soup.find_all(["h2", "h3"]):
+    for header in soup.select("h2, h3"):
         next_tag = header.find_next_sibling()
 
         while next_tag:
@@ -45,7 +87,7 @@ def extract_dragon_names():
                 break
 
             if next_tag.name == "ul":
-                for li in next_tag.find_all("li"):
+                for li in next_tag.select("li"):
                     name = clean(li.get_text())
                     name = name.split("(")[0].strip()
                     if len(name) > 2:
@@ -60,14 +102,67 @@ def extract_dragon_names():
 # -----------------------------
 def get_dragon_page(name):
     url = BASE + "/wiki/" + name.replace(" ", "_")
-    r = requests.get(url, headers=HEADERS)
+    r = session.get(url)
     return (url, r.text)
 
+def fetch_dragon(name):
+    """Roda nas threads: só a ida à rede, com o tempo gasto."""
+    start = time.perf_counter()
+    try:
+        url, html = get_dragon_page(name)
+    except Exception as e:
+        print(f"[ERRO] {name}: {e}")
+        html = None
+    return name, html, time.perf_counter() - start
+
+def fetch_api_batch(names, api_url=None):
+    """Wikitext e imagem principal de até API_BATCH páginas numa requisição.
+
+    Devolve (names, {nome pedido: página}, tempo gasto).
+    """
+    start = time.perf_counter()
+    params = {
+        "action": "query",
+        "format": "json",
+        "titles": "|".join(names),
+        "prop": "revisions|pageimages",
+        "rvprop": "content",
+        "rvslots": "main",
+        "piprop": "original",
+        "pilimit": API_BATCH,
+        "redirects": 1,
+    }
+    pages = {}
+    try:
+        while True:
+            data = session.get(api_url or API_URL, params=params).json()
+            query = data.get("query", {})
+
+            # título final da página -> nomes pedidos
+            origin = {n: [n] for n in names}
+            for step in query.get("normalized", []) + query.get("redirects", []):
+                origin.setdefault(step["to"], []).extend(origin.get(step["from"], []))
+
+            for page in query.get("pages", {}).values():
+                if "missing" in page:
+                    continue
+                for name in origin.get(page["title"], []):
+                    # com "continue" a mesma página pode vir em partes
+                    merged = pages.setdefault(name, {})
+                    merged.update({k: v for k, v in page.items() if k not in merged})
+
+            if "continue" not in data:
+                break
+            params.update(data["continue"])
+    except Exception as e:
+        print(f"[ERRO] api.php ({names[0]}…): {e}")
+    return names, pages, time.perf_counter() - start
+
 # -----------------------------
 # 3. PARSE INFOBOX
 # -----------------------------
 def parse_infobox(html):
-    soup = BeautifulSoup(html, "html.parser")
+    soup = html_parsing.parse(html, only=DRAGON_PAGE_PARTS)
     box = soup.select_one(".portable-infobox")
     if not box:
         return {}
@@ -84,6 +179,66 @@ def parse_infobox(html):
 
     return data
 
+# marcação de wikitext -> texto, na ordem
+WIKI_MARKUP = [
+    (re.compile(r"<ref[^>]*/>|<ref[^>]*>.*?</ref>", re.S), ""),
+    (re.compile(r"<br\s*/?>", re.I), " "),
+    (re.compile(r"\[\[(?:File|Image):[^\]]*\]\]", re.I), ""),
+    (re.compile(r"\[\[(?:[^|\]]*\|)?([^\]]*)\]\]"), r"\1"),
+    (re.compile(r"'{2,}"), ""),
+    (re.compile(r"<[^>]+>"), ""),
+]
+TEMPLATE = re.compile(r"\{\{[^{}]*\}\}")
+
+def wikitext_to_text(value):
+    while TEMPLATE.search(value):  # predefinições aninhadas, de dentro para fora
+        value = TEMPLATE.sub("", value)
+    for pattern, repl in WIKI_MARKUP:
+        value = pattern.sub(repl, value)
+    return clean(value)
+
+def infobox_params(wikitext):
+    """Parâmetros "nome = valor" da primeira {{Infobox ...}} do wikitext."""
+    start = re.search(r"\{\{\s*Infobox", wikitext, re.I)
+    if not start:
+        return {}
+
+    # separa nos "|" de nível zero, respeitando {{ }} e [[ ]] internos
+    parts, current, depth = [], [], 0
+    for tok in re.split(r"(\{\{|\}\}|\[\[|\]\]|\|)", wikitext[start.end():]):
+        if tok in ("{{", "[["):
+            depth += 1
+        elif tok in ("}}", "]]"):
+            if tok == "}}" and depth == 0:
+                break  # fim da infobox
+            depth -= 1
+        elif tok == "|" and depth == 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(tok)
+    parts.append("".join(current))
+
+    params = {}
+    for part in parts[1:]:  # parts[0] é o resto do nome da predefinição
+        key, sep, value = part.partition("=")
+        if sep and key.strip():
+            params[key.strip()] = value
+    return params
+
+def parse_api_page(page):
+    """Mesmo mapeamento de parse_infobox, a partir da resposta do api.php."""
+    rev = (page.get("revisions") or [{}])[0]
+    main = rev.get("slots", {}).get("main", rev)
+    wikitext = main.get("*") or main.get("content") or ""
+
+    data = {}
+    for key, value in infobox_params(wikitext).items():
+        data[key.lower()] = wikitext_to_text(value)
+
+    data["cover"] = page.get("original", {}).get("source", "")
+    return data
+
 # -----------------------------
 # 4. BUILD MARKDOWN WITH YAML
 # -----------------------------
@@ -125,26 +280,134 @@ def make_md(name, info):
 # -----------------------------
 # 5. SAVE FILE
 # -----------------------------
-def save(name, text):
+def save(name, text, writer):
+    """Entrega a nota à thread do writer (grava só se mudou, temp + rename)."""
     safe = name.replace("/", "-")
-    path = os.path.join(OUTPUT_FOLDER, f"{safe}.md")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(text)
+    writer.submit(os.path.join(OUTPUT_FOLDER, f"{safe}.md"), text)
 
 # -----------------------------
 # MAIN
 # -----------------------------
-def main():
+# etapas do pipeline: download nas threads, parse + render nos processos
+# o que foi baixado fica no armazém do --render-only, com o parser que o lê
+STORED_PARSERS = {"html": parse_infobox, "api": parse_api_page}
+
+def fetch_html_job(name, store):
+    name, html, t_fetch = fetch_dragon(name)
+    if html is None:
+        return None
+    store.put(name, {"name": name, "kind": "html", "raw": html})
+    return [(name, html)], t_fetch, parse_infobox
+
+def fetch_api_job(batch, api_url, store):
+    batch, pages, t_fetch = fetch_api_batch(batch, api_url)
+    for name in batch:
+        if name not in pages:
+            print(f"[SKIP] {name}: not found via api.php")
+    found = [(name, pages[name]) for name in batch if name in pages]
+    for name, page in found:
+        store.put(name, {"name": name, "kind": "api", "raw": page})
+    return (found, t_fetch, parse_api_page) if found else None
+
+def render_dragons(pages, t_fetch, parse):
+    """Roda num processo: (nome, markdown, tempos de fetch, parse e render) por
+    página, mais (nome, erro) das páginas que falharam."""
+    rendered, errors = [], []
+    for name, raw in pages:
+        t0 = time.perf_counter()
+        try:
+            info = parse(raw)
+            t1 = time.perf_counter()
+            md = make_md(name, info)
+        except Exception as e:  # uma página com erro não derruba o lote
+            errors.append((name, f"{e!r}"))
+            continue
+        # tempo da requisição dividido entre as páginas do lote
+        rendered.append((name, md, t_fetch / len(pages), t1 - t0, time.perf_counter() - t1))
+    return rendered, errors
+
+def render_stored(blobs):
+    """Roda num processo (--render-only): páginas guardadas -> (nome, markdown)."""
+    rendered = []
+    for blob in blobs:
+        payload = raw_store.decode(blob)
+        parse = STORED_PARSERS[payload["kind"]]
+        rendered.append((payload["name"], make_md(payload["name"], parse(payload["raw"]))))
+    return rendered
+
+def main(api=False, api_url=API_URL, refresh=False, render_only=False):
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    if render_only:
+        writer = raw_store.render_all(VAULT_SOURCE, render_stored, lambda w, r: save(*r, w), PARSE_WORKERS,
+                                      html_parsing.settings(), RENDER_CHUNK, meter, prefix="[+]")
+        print(f"[+] Rendered {writer.summary()}")
+        meter.finish(prefix="[+]", notes=writer.stats)
+        return
+
+    with VaultIndex() as vault:
+        print(f"[+] Vault: {scan_summary(vault.scan(VAULT_SOURCE, OUTPUT_FOLDER))}")
+        in_vault = vault.titles(VAULT_SOURCE)
+
     names = extract_dragon_names()
     print(f"[+] Found {len(names)} dragons!")
+    if not refresh:
+        names = [n for n in names if n not in in_vault]
+        print(f"[+] {len(names)} not in the vault yet")
 
-    for name in names:
-        print("Scraping:", name)
-        url, html = get_dragon_page(name)
-        info = parse_infobox(html)
-        md = make_md(name, info)
-        save(name, md)
+    if api:
+        jobs = [names[i:i + API_BATCH] for i in range(0, len(names), API_BATCH)]
+        fetch, args = fetch_api_job, (api_url,)
+    else:
+        jobs, fetch, args = names, fetch_html_job, ()
 
+    # páginas baixadas em paralelo, parse e render em outros processos,
+    # gravação (na thread do writer) conforme chegam
+    totals = {"fetch": 0.0, "parse": 0.0, "render": 0.0}
+    saved = 0
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as fetch_pool, \
+            process_pool(PARSE_WORKERS, html_parsing.settings()) as parse_pool, \
+            vault_writer.BatchWriter(meter=meter) as writer, RawStore(VAULT_SOURCE) as store:
+        for rendered, errors in staged_map(fetch_pool, parse_pool, fetch, render_dragons,
+                                           jobs, MAX_IN_FLIGHT, MAX_QUEUED, *args, store):
+            for name, e in errors:
+                writer.add_error(name, e)
+            for name, md, t_fetch, t_parse, t_render in rendered:
+                save(name, md, writer)
+                totals["fetch"] += t_fetch
+                totals["parse"] += t_parse
+                totals["render"] += t_render
+                meter.add_stage("parse", t_parse)
+                meter.add_stage("render", t_render)
+                saved += 1
+                print(f"Scraped: {name} (fetch {t_fetch * 1e3:.0f} ms, parse {t_parse * 1e3:.1f} ms, "
+                      f"render {t_render * 1e3:.1f} ms)")
+
+    totals["save"] = writer.stats["seconds"]
+    if saved:
+        print("[+] Average per page: " + ", ".join(
+            f"{stage} {total / saved * 1e3:.1f} ms" for stage, total in totals.items()))
+    print(f"[+] Saved {saved}/{len(names)} dragons ({writer.summary()})")
+    print(f"[+] HTTP cache: {session.cache_summary()}")
+    meter.finish(prefix="[+]", notes=writer.stats, cache=session.stats)
     print("\nDone! All dragons exported.\n")
 
-main()
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fandom (HTTYD) dragons -> Obsidian")
+    parser.add_argument("--api", action="store_true",
+                        help=f"read infoboxes in batches of {API_BATCH} through api.php instead of the article HTML")
+    parser.add_argument("--api-url", default=API_URL,
+                        help="api.php endpoint (default: DRAGONS_API_URL or the wiki's own)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="scrape dragons that already have a note too (rewrites only what changed)")
+    parser.add_argument("--render-only", action="store_true",
+                        help="rebuild the notes from the pages already downloaded, without the network")
+    parser.add_argument("--profile", action="store_true",
+                        help="run under cProfile and save the stats next to the run metrics")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = vars(parse_args())
+    if args.pop("profile"):
+        metrics.profile(VAULT_SOURCE, main, **args)
+    else:
+        main(**args)
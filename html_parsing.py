@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Parsing de HTML compartilhado pelos scrapers (Goodreads, Fandom)
+O backend é escolhido por HTML_PARSER (variável de ambiente ou argumento):
+  - "html.parser": BeautifulSoup com o parser da stdlib (padrão, sem dependências)
+  - "lxml":        BeautifulSoup com lxml (pip install lxml)
+  - "selectolax":  motor lexbor em C (pip install selectolax), sem BeautifulSoup
+`only` restringe a árvore aos trechos que interessam ("div.elementList",
+".portable-infobox", "script"...): nos backends BeautifulSoup só esses
+elementos (e seus filhos) são materializados; HTML_PARTIAL=0 desliga isso.
+"""
+
+import os
+from bs4 import BeautifulSoup, SoupStrainer
+
+# --------------------------------------------------------
+# CONFIG
+# --------------------------------------------------------
+HTML_PARSER = os.environ.get("HTML_PARSER", "html.parser")
+HTML_PARTIAL = os.environ.get("HTML_PARTIAL", "1") != "0"
+PARSERS = ("html.parser", "lxml", "selectolax")
+
+
+# --------------------------------------------------------
+# ÁRVORE PARCIAL (BeautifulSoup)
+# --------------------------------------------------------
+def _strainer(only):
+    """SoupStrainer para seletores simples "tag", ".classe" ou "tag.classe".
+
+    Tags e classes de todos os seletores são combinadas, então a árvore
+    pode trazer um pouco mais do que o pedido, nunca menos.
+    """
+    names, classes = set(), set()
+    for sel in only:
+        name, _, cls = sel.partition(".")
+        names.add(name or None)
+        classes.add(cls or None)
+
+    kwargs = {}
+    if None not in names:
+        kwargs["name"] = list(names)
+    if None not in classes:
+        # elementos com várias classes chegam como "a b c"
+        kwargs["class_"] = lambda c: c is not None and not classes.isdisjoint(c.split())
+    return SoupStrainer(**kwargs)
+
+
+# --------------------------------------------------------
+# ADAPTADOR selectolax -> API usada pelos scrapers
+# --------------------------------------------------------
+class LexborNode:
+    """Subconjunto da API de bs4.Tag usado pelos scrapers sobre um nó lexbor."""
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    @property
+    def name(self):
+        return self.node.tag
+
+    @property
+    def string(self):
+        return self.node.text(deep=True)
+
+    def select(self, selector):
+        return [LexborNode(n) for n in self.node.css(selector)]
+
+    def select_one(self, selector):
+        n = self.node.css_first(selector)
+        return LexborNode(n) if n is not None else None
+
+    def get_text(self, separator="", strip=False):
+        return self.node.text(deep=True, separator=separator, strip=strip)
+
+    def get(self, key, default=None):
+        value = self.node.attributes.get(key)
+        return default if value is None else value
+
+    def has_attr(self, key):
+        return key in self.node.attributes
+
+    def __getitem__(self, key):
+        value = self.node.attributes.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def find_next_sibling(self):
+        n = self.node.next
+        while n is not None and n.tag.startswith("-"):  # -text, -comment
+            n = n.next
+        return LexborNode(n) if n is not None else None
+
+
+# --------------------------------------------------------
+# API
+# --------------------------------------------------------
+def parse(html, only=None, parser=None):
+    """Árvore do documento com a API de BeautifulSoup usada pelos scrapers.
+
+    `html` pode ser str ou bytes. Com selectolax o documento é sempre lido
+    inteiro (o parser em C já é mais barato que a árvore parcial do bs4).
+    """
+    parser = parser or HTML_PARSER
+    if parser == "selectolax":
+        from selectolax.lexbor import LexborHTMLParser
+        return LexborNode(LexborHTMLParser(html).root)
+    if parser not in PARSERS:
+        raise ValueError(f"parser HTML desconhecido: {parser} (use {', '.join(PARSERS)})")
+    strainer = _strainer(only) if only and HTML_PARTIAL else None
+    return BeautifulSoup(html, parser, parse_only=strainer)
+
+
+def settings():
+    """Configuração atual, para repassar a workers de processo (pipeline.process_pool)."""
+    return {"html_parsing.HTML_PARSER": HTML_PARSER, "html_parsing.HTML_PARTIAL": HTML_PARTIAL}
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Cache HTTP persistente compartilhado pelos importadores
+Guarda os corpos das respostas comprimidos em disco (gzip) junto com
+ETag / Last-Modified e um TTL; entradas vencidas são revalidadas com GET
+condicional (If-None-Match / If-Modified-Since), de modo que reexecuções
+viram leituras locais ou respostas 304.
+"""
+
+import os
+import json
+import gzip
+import time
+import hashlib
+import threading
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# --------------------------------------------------------
+# CONFIG
+# --------------------------------------------------------
+CACHE_DIR = os.environ.get(
+    "IMPORTER_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "http"),
+)
+DEFAULT_TTL = 24 * 3600  # segundos antes de revalidar com o servidor
+
+# cabeçalhos guardados junto com o corpo
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+# --------------------------------------------------------
+# UTILIDADES
+# --------------------------------------------------------
+def cache_key(url, params=None):
+    req = requests.Request("GET", url, params=params).prepare()
+    return hashlib.sha256(req.url.encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path, data):
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _build_response(url, body, headers, status=200):
+    r = requests.Response()
+    r.status_code = status
+    r.url = url
+    r._content = body
+    r.headers = CaseInsensitiveDict(headers)
+    r.encoding = get_encoding_from_headers(r.headers)
+    return r
+
+
+# --------------------------------------------------------
+# SESSÃO COM CACHE
+# --------------------------------------------------------
+class CachedSession(requests.Session):
+    """requests.Session cujo GET passa pelo cache em disco.
+
+    Só GETs simples (sem stream) com resposta 200 são guardados; qualquer
+    outra requisição vai direto para a rede. Se `limiter` for dado (um
+    rate_limit.RateLimiter, ou HostBudgets para um limite por host), toda
+    ida à rede passa por ele; leituras do cache não consomem tokens. Com um
+    `meter` (metrics.Meter), cada get() conta na etapa "fetch" e cada ida à
+    rede entra nas métricas do host (latência, status, bytes, retries).
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl=DEFAULT_TTL, limiter=None, meter=None):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.limiter = limiter
+        self.meter = meter
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "bytes_saved": 0}
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + ".json", base + ".gz"
+
+    def _load(self, key):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = gzip.decompress(f.read())
+        except (OSError, ValueError, EOFError):
+            return None, None
+        return meta, body
+
+    def _store(self, key, url, resp, body=None):
+        meta_path, body_path = self._paths(key)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        headers = {h: resp.headers[h] for h in KEPT_HEADERS if h in resp.headers}
+        meta = {"url": url, "headers": headers, "stored_at": time.time(), "ttl": self.ttl}
+        if body is not None:
+            _atomic_write(body_path, gzip.compress(body))
+        _atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+        return meta
+
+    def _fetch(self, url, **kwargs):
+        limiter = self.limiter
+        if hasattr(limiter, "for_url"):  # rate_limit.HostBudgets
+            limiter = limiter.for_url(url)
+        if limiter is None:
+            return self._measured_get(url, **kwargs)
+        with limiter:
+            return self._measured_get(url, **kwargs)
+
+    def _measured_get(self, url, **kwargs):
+        if self.meter is None:
+            return super().get(url, **kwargs)
+        start = time.perf_counter()
+        try:
+            resp = super().get(url, **kwargs)
+        except requests.RequestException:
+            self.meter.add_request(url, time.perf_counter() - start)
+            raise
+        if kwargs.get("stream"):
+            nbytes = int(resp.headers.get("Content-Length") or 0)
+        else:
+            nbytes = len(resp.content)
+        # só há retries se alguém montar um HTTPAdapter com urllib3 Retry
+        retries = len(getattr(getattr(resp.raw, "retries", None), "history", None) or ())
+        self.meter.add_request(url, time.perf_counter() - start, resp.status_code, nbytes, retries)
+        return resp
+
+    def get(self, url, params=None, ttl=None, **kwargs):
+        if self.meter is None:
+            return self._get(url, params, ttl, **kwargs)
+        with self.meter.stage("fetch"):
+            return self._get(url, params, ttl, **kwargs)
+
+    def _get(self, url, params=None, ttl=None, **kwargs):
+        if kwargs.get("stream"):
+            return self._fetch(url, params=params, **kwargs)
+
+        key = cache_key(url, params)
+        meta, body = self._load(key)
+        ttl = self.ttl if ttl is None else ttl
+
+        if meta is not None and time.time() - meta["stored_at"] < ttl:
+            self._count("hits")
+            self._count("bytes_saved", len(body))
+            return _build_response(meta["url"], body, meta["headers"])
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if meta is not None:
+            if "ETag" in meta["headers"]:
+                headers["If-None-Match"] = meta["headers"]["ETag"]
+            if "Last-Modified" in meta["headers"]:
+                headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+
+        resp = self._fetch(url, params=params, headers=headers, **kwargs)
+
+        if resp.status_code == 304 and meta is not None:
+            self._count("revalidated")
+            self._count("bytes_saved", len(body))
+            # o servidor pode mandar validadores novos no 304
+            for h in ("ETag", "Last-Modified"):
+                if h in resp.headers:
+                    meta["headers"][h] = resp.headers[h]
+            self._store(key, meta["url"], _build_response(meta["url"], body, meta["headers"]))
+            return _build_response(meta["url"], body, meta["headers"])
+
+        self._count("misses")
+        if resp.status_code == 200:
+            self._store(key, resp.url, resp, resp.content)
+        return resp
+
+    def cache_summary(self):
+        s = self.stats
+        return (
+            f"{s['hits']} hits, {s['revalidated']} revalidados (304), "
+            f"{s['misses']} da rede, {s['bytes_saved'] / 1e6:.1f} MB economizados"
+        )
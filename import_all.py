@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Atualiza o vault inteiro: roda os importadores (Pokémon, aves, livros,
+dragões) ao mesmo tempo, num só processo
+Cada importador continua com seu main() e suas threads; o que é
+compartilhado é o orçamento por host (rate_limit.HostBudgets), que passa a
+ser o limiter de todas as sessões, e os processos de parse, divididos
+entre as fontes que usam pool de processos. Durante a execução imprime o
+progresso de tempos em tempos e, no fim, um relatório combinado.
+"""
+
+import os
+import time
+import argparse
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from rate_limit import HostBudgets
+
+# --------------------------------------------------------
+# CONFIG
+# --------------------------------------------------------
+# fonte -> (módulo, atributo com a pasta de saída)
+SOURCES = {
+    "pokemon": ("import_pokemon", "OUTPUT_DIR"),
+    "birds": ("import_inaturalist_birds", "OUTPUT_DIR"),
+    "books": ("import_books", "OUTPUT_DIR"),
+    "dragons": ("dragons", "OUTPUT_FOLDER"),
+}
+
+# domínio (vale para subdomínios) -> (requisições por segundo, simultâneas)
+HOST_BUDGETS = {
+    "pokeapi.co": (10, 8),
+    "api.inaturalist.org": (1, 2),  # a API pede ~60 requisições/minuto
+    "en.wikipedia.org": (10, 5),
+    "goodreads.com": (2, 5),
+    "fandom.com": (5, 8),
+}
+DEFAULT_BUDGET = (5, 4)  # demais hosts (eBird, GitHub...)
+
+PROGRESS_EVERY = 30  # segundos entre linhas de progresso
+
+
+# --------------------------------------------------------
+# EXECUÇÃO
+# --------------------------------------------------------
+def count_notes(folder, since):
+    """Notas .md gravadas em `folder` (recursivo) a partir de `since`."""
+    n = 0
+    for root, _, files in os.walk(folder):
+        for f in files:
+            if f.endswith(".md") and os.path.getmtime(os.path.join(root, f)) >= since:
+                n += 1
+    return n
+
+
+def network_requests(module):
+    stats = module.session.stats
+    return stats["misses"] + stats["revalidated"]
+
+
+def run_source(name, module, status):
+    status[name] = {"state": "rodando", "start": time.time()}
+    try:
+        module.main()
+        status[name]["state"] = "ok"
+    except BaseException as e:  # inclui SystemExit de um importador
+        status[name]["state"] = f"erro: {e!r}"
+        print(f"[ERRO] {name}: {e!r}")
+    status[name]["end"] = time.time()
+
+
+def report_progress(modules, status, budgets, started, stop):
+    while not stop.wait(PROGRESS_EVERY):
+        elapsed = time.time() - started
+        sources = ", ".join(
+            f"{name} {status.get(name, {}).get('state', 'na fila')} ({network_requests(m)} req)"
+            for name, m in modules.items()
+        )
+        total = sum(budgets.requests.values())
+        print(f"[INFO] {elapsed:.0f}s: {sources}; {total} req, {total / elapsed:.1f} req/s")
+
+
+def print_report(modules, status, budgets, started):
+    elapsed = time.time() - started
+    print("\n=== RELATÓRIO COMBINADO ===")
+    print(f"{'fonte':<10}{'estado':<12}{'tempo':>8}{'notas':>8}{'rede':>8}{'cache':>8}{'notas/s':>9}")
+    for name, module in modules.items():
+        st = status.get(name, {})
+        duration = st.get("end", time.time()) - st.get("start", started)
+        notes = count_notes(getattr(module, SOURCES[name][1]), started)
+        print(f"{name:<10}{st.get('state', '-')[:11]:<12}{duration:>7.0f}s{notes:>8}"
+              f"{network_requests(module):>8}{module.session.stats['hits']:>8}"
+              f"{notes / duration if duration else 0:>9.1f}")
+
+    print(f"\n{'host':<22}{'req':>8}{'req/s':>8}{'limite':>14}")
+    for host, n in sorted(budgets.requests.items(), key=lambda kv: -kv[1]):
+        rate, in_flight = HOST_BUDGETS.get(host, DEFAULT_BUDGET)
+        label = "(outros hosts)" if host == "*" else host
+        print(f"{label:<22}{n:>8}{n / elapsed:>8.1f}{f'{rate}/s, {in_flight}x':>14}")
+    print(f"\n[INFO] Tempo total: {elapsed:.0f}s")
+
+
+def main(sources=tuple(SOURCES)):
+    budgets = HostBudgets(HOST_BUDGETS, default=DEFAULT_BUDGET)
+    modules = {name: importlib.import_module(SOURCES[name][0]) for name in sources}
+
+    # um orçamento por host para todas as sessões; CPUs divididas entre
+    # as fontes com pool de processos
+    with_pools = [m for m in modules.values() if hasattr(m, "PARSE_WORKERS")]
+    for m in modules.values():
+        m.session.limiter = budgets
+        if hasattr(m, "PARSE_WORKERS"):
+            m.PARSE_WORKERS = max(1, (os.cpu_count() or 1) // len(with_pools))
+            m.MAX_QUEUED = m.PARSE_WORKERS * 2
+
+    status = {}
+    started = time.time()
+    stop = threading.Event()
+    progress = threading.Thread(target=report_progress, args=(modules, status, budgets, started, stop),
+                                daemon=True)
+    progress.start()
+
+    with ThreadPoolExecutor(max_workers=len(modules)) as pool:
+        for name, module in modules.items():
+            pool.submit(run_source, name, module, status)
+
+    stop.set()
+    print_report(modules, status, budgets, started)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Roda todos os importadores juntos, com limite por host")
+    parser.add_argument("--only", action="append", dest="sources", choices=list(SOURCES),
+                        help="roda só esta fonte; pode repetir (padrão: todas)")
+    parser.add_argument("--budget", nargs=3, action="append", default=[],
+                        metavar=("HOST", "RPS", "MAX_IN_FLIGHT"),
+                        help="sobrescreve o orçamento de um host, ex.: --budget pokeapi.co 20 10")
+    parser.add_argument("--profile", action="store_true",
+                        help="roda tudo sob o cProfile (métricas de cada fonte são gravadas sempre)")
+    args = parser.parse_args()
+    for host, rps, in_flight in args.budget:
+        HOST_BUDGETS[host] = (float(rps), int(in_flight))
+    return args.sources or tuple(SOURCES), args.profile
+
+
+if __name__ == "__main__":
+    sources, profile = parse_args()
+    if profile:
+        metrics.profile("all", main, sources)
+    else:
+        main(sources)
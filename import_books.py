@@ -1,50 +1,85 @@
 # -*- coding: utf-8 -*-
 import os
-import requests
-from bs4 import BeautifulSoup
-import yaml
+import re
+import argparse
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+import http_cache
+import html_parsing
+import metrics
+import raw_store
+import vault_writer
+from pipeline import staged_map, process_pool
+from raw_store import RawStore
+from rate_limit import RateLimiter
+from vault_index import VaultIndex, scan_summary
 
 # --------------------------------------------------------
 # Configurações
 # --------------------------------------------------------
 OUTPUT_DIR = r"C:\Users\Usuario\Documents\Gnosis\3- Bem estar\Hobbies e Inspirações\Coleções\Leituras\Livros"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-CHECKPOINT_FILE = os.path.join(OUTPUT_DIR, "checkpoint.json")
+VAULT_SOURCE = "books"  # nome da fonte no vault_index
 MAX_WORKERS = 5
+MAX_IN_FLIGHT = MAX_WORKERS * 4
+PARSE_WORKERS = os.cpu_count() or 1  # processos para parse do HTML e render do Markdown
+MAX_QUEUED = PARSE_WORKERS * 2  # páginas baixadas esperando um processo livre
+RENDER_CHUNK = 50  # livros por tarefa no --render-only
+
+REQUESTS_PER_SECOND = 2  # limite para goodreads.com
+
+GOODREADS_BASE = "https://www.goodreads.com"
+
+# listas a importar; livros em várias listas acumulam gêneros/subTypes
+LISTS = [
+    {
+        "url": "https://www.goodreads.com/list/show/2455.The_Most_Disturbing_Books_Ever_Written",
+        "genre": "Terror/Horror",
+        "subType": "Terror",
+    },
+]
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
 }
 
+meter = metrics.Meter(VAULT_SOURCE)
+
+# sessão com keep-alive e pool do tamanho do número de threads
+session = http_cache.CachedSession(
+    limiter=RateLimiter(REQUESTS_PER_SECOND, max_in_flight=MAX_WORKERS), meter=meter
+)
+session.headers.update(HEADERS)
+session.mount("https://", HTTPAdapter(pool_maxsize=MAX_WORKERS))
+
 # --------------------------------------------------------
 # Utilitários
 # --------------------------------------------------------
 def safe_filename(s):
     return s.replace("/", "-").replace("\\", "-").replace(":", "-").strip()
 
-def write_md(filename, yaml_obj, body_md=""):
-    path = os.path.join(OUTPUT_DIR, filename)
-    if os.path.exists(path):
-        return  # evita sobrescrever arquivos existentes
-    with open(path, "w", encoding="utf-8") as f:
-        f.write("---\n")
-        f.write(yaml.safe_dump(yaml_obj, sort_keys=False, allow_unicode=True))
-        f.write("---\n\n")
-        f.write(body_md)
-
 # --------------------------------------------------------
 # Scraping de uma página da lista
 # --------------------------------------------------------
-def scrape_list_page(url):
-    resp = requests.get(url, headers=HEADERS)
+def fetch_page(url):
+    resp = session.get(url, timeout=30)
     resp.raise_for_status()
-    soup = BeautifulSoup(resp.content, "html.parser")
+    return resp.content
+
+# só estes trechos da página da lista são lidos
+LIST_PAGE_PARTS = ("div.elementList", "div.pagination")
+
+def parse_list_page(html):
+    """Livros da página e o total de páginas indicado na paginação."""
+    soup = html_parsing.parse(html, only=LIST_PAGE_PARTS)
     books = []
     
     # Cada livro está dentro de <div class="elementList">
     for book_row in soup.select("div.elementList"):
+        link_tag = book_row.select_one("a.bookTitle")
         title_tag = book_row.select_one("a.bookTitle span")
         author_tag = book_row.select_one("a.authorName span")
         rating_tag = book_row.select_one("span.minirating")
@@ -58,62 +93,197 @@ def scrape_list_page(url):
             text = rating_tag.get_text()
             avg_rating = text.split(" avg rating")[0].strip()
         cover_url = cover_tag['src'] if cover_tag and cover_tag.has_attr('src') else None
+        href = link_tag.get("href", "") if link_tag else ""
+        book_id = re.search(r"/book/show/(\d+)", href)
         books.append({
+            "book_id": book_id.group(1) if book_id else None,
+            "url": urljoin(GOODREADS_BASE, href) if href else None,
             "title": title,
             "author": author,
             "average_rating": avg_rating,
             "image_url": cover_url,
-            "genre": "Terror/Horror",
         })
-    return books
+
+    # <div class="pagination"> ... <a>2</a> ... <a>12</a> <a class="next_page">
+    pages = [int(a.get_text(strip=True)) for a in soup.select("div.pagination a")
+             if a.get_text(strip=True).isdigit()]
+    return books, max(pages, default=1)
+
+# etapas do pipeline: download nas threads, parse nos processos
+def fetch_list_page(job):
+    i, url = job
+    print(f"[INFO] Scraping {url}")
+    try:
+        return i, fetch_page(url)
+    except Exception as e:
+        print(f"[ERRO] Página {url}: {e}")
+        return None
+
+def parse_list_job(i, html):
+    books, n_pages = parse_list_page(html)
+    return i, books, n_pages
 
 # --------------------------------------------------------
-# Percorrer todas as páginas da lista
+# Várias listas, um livro: índice global por id do Goodreads
 # --------------------------------------------------------
-def get_all_books_from_list(list_url):
-    books = []
-    page = 1
-    while True:
-        url = f"{list_url}?page={page}"
-        print(f"[INFO] Scraping {url}")
-        page_books = scrape_list_page(url)
-        if not page_books:
+def list_name(list_url):
+    slug = list_url.rstrip("/").rsplit("/", 1)[-1]
+    return slug.split(".", 1)[-1].replace("_", " ")
+
+def book_uid(book):
+    return book.get("book_id") or legacy_uid(book)
+
+def legacy_uid(book):
+    # para livros sem id do Goodreads
+    return f"{book.get('title')}_{book.get('author')}"
+
+def crawl_lists(lists, fetch_pool, parse_pool):
+    """Baixa as listas em paralelo e junta os livros repetidos num só registro.
+
+    A primeira página de cada lista informa quantas existem; as demais
+    páginas de todas as listas passam juntas pelo mesmo pipeline.
+    """
+    index = {}
+
+    def crawl(jobs):
+        for seconds, (i, books, n_pages) in staged_map(fetch_pool, parse_pool, fetch_list_page,
+                                                       metrics.timed(parse_list_job),
+                                                       jobs, MAX_IN_FLIGHT, MAX_QUEUED):
+            meter.add_stage("parse", seconds)
+            for b in books:
+                index.setdefault(book_uid(b), {**b, "list_ids": set()})["list_ids"].add(i)
+            yield i, n_pages
+
+    rest = []
+    for i, n_pages in crawl([(i, f"{spec['url']}?page=1") for i, spec in enumerate(lists)]):
+        print(f"[INFO] Lista {list_name(lists[i]['url'])} com {n_pages} páginas.")
+        rest += [(i, f"{lists[i]['url']}?page={page}") for page in range(2, n_pages + 1)]
+    for _ in crawl(rest):
+        pass
+
+    # gêneros/listas na ordem da configuração, sem depender de qual terminou antes
+    for book in index.values():
+        specs = [lists[i] for i in sorted(book.pop("list_ids"))]
+        book["genres"] = list(dict.fromkeys(spec["genre"] for spec in specs))
+        book["subTypes"] = list(dict.fromkeys(spec["subType"] for spec in specs))
+        book["lists"] = [list_name(spec["url"]) for spec in specs]
+
+    return index
+
+# --------------------------------------------------------
+# Enriquecimento: página do livro (editora, ano, idioma, páginas)
+# --------------------------------------------------------
+# JSON-LD, __NEXT_DATA__ e os <p> de publicação
+DETAIL_PAGE_PARTS = ("script", "p")
+
+def parse_book_details(html):
+    soup = html_parsing.parse(html, only=DETAIL_PAGE_PARTS)
+    details = {}
+
+    # JSON-LD (schema.org/Book): idioma e número de páginas
+    for tag in soup.select('script[type="application/ld+json"]'):
+        try:
+            ld = json.loads(tag.string or "")
+        except ValueError:
+            continue
+        if isinstance(ld, dict) and ld.get("@type") == "Book":
+            details["language"] = ld.get("inLanguage")
+            details["pages"] = ld.get("numberOfPages")
+
+    # __NEXT_DATA__ (Apollo state): editora e data de publicação
+    next_data = soup.select_one("script#__NEXT_DATA__")
+    if next_data:
+        try:
+            state = json.loads(next_data.string or "")["props"]["pageProps"]["apolloState"]
+        except (ValueError, KeyError, TypeError):
+            state = {}
+        for obj in state.values():
+            info = obj.get("details") if isinstance(obj, dict) and obj.get("__typename") == "Book" else None
+            if not info:
+                continue
+            details["publisher"] = info.get("publisher")
+            details["pages"] = details.get("pages") or info.get("numPages")
+            details["language"] = details.get("language") or (info.get("language") or {}).get("name")
+            if info.get("publicationTime") is not None:
+                published = datetime(1970, 1, 1) + timedelta(milliseconds=info["publicationTime"])
+                details["year"] = published.year
             break
-        books.extend(page_books)
-        page += 1
-    return books
+
+    # texto visível como último recurso
+    if not details.get("year"):
+        pub = soup.select_one('p[data-testid="publicationInfo"]')
+        year = re.search(r"\b(\d{3,4})\b", pub.get_text()) if pub else None
+        details["year"] = int(year.group(1)) if year else None
+    if not details.get("pages"):
+        fmt = soup.select_one('p[data-testid="pagesFormat"]')
+        pages = re.match(r"\s*(\d+)\s+pages", fmt.get_text()) if fmt else None
+        details["pages"] = int(pages.group(1)) if pages else None
+
+    return {k: v for k, v in details.items() if v}
+
+def fetch_book_details(book, enrich=False, store=None):
+    """Etapa de rede: a página do livro, se --enrich (senão só repassa o livro).
+
+    O livro e a página vão para o armazém do --render-only; sem página nova,
+    a de uma execução anterior é mantida. O render recebe a mesma página
+    que fica guardada, então ele e o --render-only geram a mesma nota.
+    """
+    html = None
+    if enrich and book.get("url"):
+        try:
+            # o Goodreads serve UTF-8; o armazém guarda JSON, então vai como texto
+            html = fetch_page(book["url"]).decode("utf-8", "replace")
+        except Exception as e:
+            print(f"[ERRO] Detalhes de {book.get('title')}: {e}")
+    if store is not None:
+        key = book_uid(book)
+        html = html or (store.get(key) or {}).get("details_html")
+        store.put(key, {"book": book, "details_html": html})
+    return book, html
 
 # --------------------------------------------------------
 # Processar e gerar Markdown de cada livro
 # --------------------------------------------------------
-def process_book(book, processed_set):
+def render_book(book, details_html=None):
+    """Etapa de CPU (roda num processo): devolve (título, arquivo, texto da nota),
+    ou (título, None, mensagem) se o livro não pôde ser gerado."""
+    try:
+        return _render_book(book, details_html)
+    except Exception as e:  # um livro com erro não derruba o pipeline
+        return book.get("title"), None, f"{e!r}"
+
+def _render_book(book, details_html):
+    if details_html:
+        book.update(parse_book_details(details_html))
+
     title = book.get("title")
     autor = book.get("author")
-    uid = f"{title}_{autor}"
-    if uid in processed_set:
-        print("[SKIP]", title)
-        return None
+    sub_types = book.get("subTypes") or ["Desconhecido"]
 
     yaml_obj = {
+        "id": book.get("book_id"),
         "title": {title: None},
         "portugueseTitle": {title: None},
         "englishTitle": {title: None},
         "coverUrl": {book.get("image_url"): None},
         "onlineRating": {book.get("average_rating") or "Desconhecido": None},
         "type": "Livros",
-        "subType": {"Terror": None},
+        "subType": {st: None for st in sub_types},
         "status": {"Desconhecido": None},
         "rating": {"Desconhecido": None},
         "autor": {autor: None},
-        "editora": {"Desconhecido": None},
-        "ano": {"Desconhecido": None},
+        "editora": {book.get("publisher") or "Desconhecido": None},
+        "ano": {book.get("year") or "Desconhecido": None},
         "país": {"Desconhecido": None},
-        "idioma": {"Desconhecido": None},
+        "idioma": {book.get("language") or "Desconhecido": None},
+        "páginas": {book.get("pages") or "Desconhecido": None},
         "era": {"Desconhecido": None},
         "cronologia": {"Desconhecido": None},
+        "genres": book.get("genres", []),
+        "lists": book.get("lists", []),
         "tags": [
             "coleção/Livros",
-            "gênero/Terror",
+            *[f"gênero/{st}" for st in sub_types],
             f"autor/{autor}",
             "país/Desconhecido",
             "era/Desconhecido",
@@ -122,41 +292,117 @@ def process_book(book, processed_set):
         ]
     }
 
+    if not yaml_obj["id"]:
+        del yaml_obj["id"]
+
     fname = safe_filename(f"{title}.md")
-    md_body = f"# {title}\n\n**Autor:** {autor}\n\n**Gênero:** Terror\n\n**Rating online:** {book.get('average_rating')}\n\n"
+    md_body = f"# {title}\n\n**Autor:** {autor}\n\n**Gênero:** {', '.join(sub_types)}\n\n**Rating online:** {book.get('average_rating')}\n\n"
     if book.get("image_url"):
         md_body += f"![cover]({book.get('image_url')})\n"
 
-    write_md(fname, yaml_obj, md_body)
-    print("[OK]", title)
-    return uid
+    return title, fname, vault_writer.render_md(yaml_obj, md_body)
+
+def render_stored(blobs):
+    """Roda num processo (--render-only): livros guardados -> (título, arquivo, texto)."""
+    rendered = []
+    for blob in blobs:
+        payload = raw_store.decode(blob)
+        rendered.append(render_book(payload["book"], payload["details_html"]))
+    return rendered
+
+def save(writer, title, fname, text):
+    if fname is None:  # erro no render; text é a mensagem
+        writer.add_error(title, text)
+        return
+
+    # grava só se mudou
+    def saved(results):
+        print("[OK]" if results[0] else "[SKIP]", title)
+
+    writer.submit(os.path.join(OUTPUT_DIR, fname), text, on_done=saved)
 
 # --------------------------------------------------------
 # Função principal
 # --------------------------------------------------------
-def main():
-    list_url = "https://www.goodreads.com/list/show/2455.The_Most_Disturbing_Books_Ever_Written"
-    books = get_all_books_from_list(list_url)
-    print(f"[INFO] Achados {len(books)} livros na lista.")
-
-    # Carregar checkpoint para evitar duplicatas
-    if os.path.exists(CHECKPOINT_FILE):
-        with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
-            processed = set(json.load(f))
-    else:
-        processed = set()
-
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
-        futures = [pool.submit(process_book, b, processed) for b in books]
-        for future in as_completed(futures):
-            uid = future.result()
-            if uid:
-                processed.add(uid)
-
-    # Salvar checkpoint final
-    with open(CHECKPOINT_FILE, "w", encoding="utf-8") as f:
-        json.dump(list(processed), f, ensure_ascii=False, indent=2)
+# campos que dependem de em quais listas o livro aparece
+MEMBERSHIP_FIELDS = ("genres", "subTypes", "lists")
+
+def membership_changed(book, store):
+    """Livro já guardado cujas listas/gêneros mudaram desde a última execução.
+
+    Sem registro no armazém não há como saber, e a nota fica como está.
+    """
+    stored = store.get(book_uid(book))
+    return stored is not None and any(stored["book"].get(k) != book.get(k) for k in MEMBERSHIP_FIELDS)
+
+def main(lists=LISTS, enrich=False, render_only=False, refresh=False):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if render_only:
+        writer = raw_store.render_all(VAULT_SOURCE, render_stored, lambda w, r: save(w, *r), PARSE_WORKERS,
+                                      html_parsing.settings(), RENDER_CHUNK, meter)
+        print(f"[INFO] Notas: {writer.summary()}")
+        meter.finish(notes=writer.stats)
+        return
+
+    # livros que já têm nota no vault: pelo id do Goodreads ou, nas notas
+    # sem id, pelo título (que também dá nome ao arquivo)
+    with VaultIndex() as vault:
+        print(f"[INFO] Vault: {scan_summary(vault.scan(VAULT_SOURCE, OUTPUT_DIR))}")
+        have_ids, have_titles = vault.ids(VAULT_SOURCE), vault.titles(VAULT_SOURCE)
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as fetch_pool, \
+            process_pool(PARSE_WORKERS, html_parsing.settings()) as parse_pool, \
+            vault_writer.BatchWriter(meter=meter) as writer, RawStore(VAULT_SOURCE) as store:
+        # todas as listas precisam terminar antes da escrita para que cada
+        # livro saia uma vez só, já com todos os gêneros e listas
+        index = crawl_lists(lists, fetch_pool, parse_pool)
+        # livros já no vault só voltam se apareceram em outra lista (ou com --refresh)
+        pending, in_vault, changed = [], 0, 0
+        for b in index.values():
+            if b.get("book_id") in have_ids or b["title"] in have_titles:
+                in_vault += 1
+                if not (refresh or membership_changed(b, store)):
+                    continue
+                changed += 1
+            pending.append(b)
+        print(f"[INFO] {len(index)} livros distintos em {len(lists)} listas, "
+              f"{in_vault} já no vault ({changed} a atualizar).")
+
+        # render inclui o parse da página do livro (--enrich), feito no mesmo processo
+        for seconds, (title, fname, text) in staged_map(fetch_pool, parse_pool, fetch_book_details,
+                                                        metrics.timed(render_book), pending,
+                                                        MAX_IN_FLIGHT, MAX_QUEUED, enrich, store):
+            meter.add_stage("render", seconds)
+            save(writer, title, fname, text)
+
+    print(f"[INFO] Notas: {writer.summary()}")
+    print(f"[INFO] Cache HTTP: {session.cache_summary()}")
+    meter.finish(notes=writer.stats, cache=session.stats)
     print("[INFO] Fim da importação.")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Importador Goodreads -> Obsidian")
+    parser.add_argument("--list", nargs=3, action="append", dest="lists",
+                        metavar=("URL", "GENRE", "SUBTYPE"),
+                        help="lista do Goodreads com seu gênero e subType; pode repetir")
+    parser.add_argument("--enrich", action="store_true",
+                        help="baixa a página de cada livro para preencher editora, ano, idioma e páginas")
+    parser.add_argument("--parser", choices=html_parsing.PARSERS, default=html_parsing.HTML_PARSER,
+                        help="backend de parsing HTML (padrão: variável HTML_PARSER ou html.parser)")
+    parser.add_argument("--render-only", action="store_true",
+                        help="regenera as notas a partir das páginas já baixadas, sem rede")
+    parser.add_argument("--refresh", action="store_true",
+                        help="reprocessa livros que já têm nota (grava só o que mudou)")
+    parser.add_argument("--profile", action="store_true",
+                        help="roda sob o cProfile e grava as estatísticas junto das métricas")
+    args = parser.parse_args()
+    args.lists = [{"url": u, "genre": g, "subType": st} for u, g, st in args.lists or []] or LISTS
+    return args
+
 if __name__ == "__main__":
-    main()
+    args = vars(parse_args())
+    html_parsing.HTML_PARSER = args.pop("parser")
+    if args.pop("profile"):
+        metrics.profile(VAULT_SOURCE, main, **args)
+    else:
+        main(**args)
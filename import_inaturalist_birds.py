@@ -8,11 +8,21 @@ Suporta retomar de onde parou e evita duplicatas.
 
 import os
 import time
-import requests
-import yaml
+import re
 import sys
-import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import csv
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import http_cache
+import metrics
+import raw_store
+import vault_writer
+from journal import Journal
+from pipeline import bounded_map
+from raw_store import RawStore
+from rate_limit import HostBudgets
+from vault_index import VaultIndex, frontmatter_fields, iter_notes, scan_summary
 
 # --------------------------------------------------------
 # CONFIG
@@ -24,12 +34,63 @@ except:
     pass
 
 OUTPUT_DIR = r"C:\Users\Usuario\Documents\Gnosis\3- Bem estar\Hobbies e Inspirações\Coleções\Animals (Non Fiction)\Birds"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-CHECKPOINT_FILE = os.path.join(OUTPUT_DIR, "checkpoint.json")
+VAULT_SOURCE = "birds"  # nome da fonte no vault_index
+
+# espécies sem capa: quando e onde foi procurado; --refresh-missing tenta de
+# novo após MISS_TTL, dobrando o prazo a cada tentativa sem sucesso
+MISSES_FILE = os.path.join(OUTPUT_DIR, "cover_misses.json")
+MISS_TTL = 7 * 24 * 3600
+MISS_MAX_DOUBLINGS = 5
+COVER_SOURCES = ("inaturalist", "wikipedia")
 MAX_WORKERS = 10  # número de threads para download paralelo
+MAX_IN_FLIGHT = MAX_WORKERS * 4  # tarefas agendadas ao mesmo tempo
+PARSE_WORKERS = os.cpu_count() or 1  # processos do --render-only
+RENDER_CHUNK = 200  # espécies por tarefa no --render-only
+
+INAT_TAXA_URL = "https://api.inaturalist.org/v1/taxa"
+INAT_REQUESTS_PER_SECOND = 1  # a API pede ~60 requisições/minuto
+INAT_MAX_IN_FLIGHT = 2
+INAT_PAGE_SIZE = 200  # espécies por página de /v1/taxa
+WIKI_API_URL = "https://en.wikipedia.org/w/api.php"
+WIKI_BATCH = 50  # limite de títulos por consulta da API do MediaWiki
+
+EBIRD_TAXONOMY_URL = "https://api.ebird.org/v2/ref/taxonomy/ebird"
+EBIRD_VERSIONS_URL = "https://api.ebird.org/v2/ref/taxonomy/versions"
+TAXONOMY_DIR = os.path.join(os.path.dirname(http_cache.CACHE_DIR), "ebird")
+
+# categorias eBird: quais viram nota e quais entram na nota da espécie (reportAs);
+# o resto (hybrid, spuh, slash) é ignorado sem nenhuma requisição
+NOTE_CATEGORIES = ("species",)
+FOLD_CATEGORIES = ("issf", "form", "domestic", "intergrade")
+
+# taxonomias localizadas baixadas uma vez e unidas por speciesCode;
+# pt_BR preenche name_pt, as demais vão para common_names
+LOCALES = ("pt_BR",)
+
+# colunas do CSV do eBird -> chaves usadas pela API JSON
+TAXONOMY_CSV_FIELDS = {
+    "SCIENTIFIC_NAME": "sciName",
+    "COMMON_NAME": "comName",
+    "SPECIES_CODE": "speciesCode",
+    "CATEGORY": "category",
+    "TAXON_ORDER": "taxonOrder",
+    "ORDER": "order",
+    "FAMILY_CODE": "familyCode",
+    "FAMILY_COM_NAME": "familyComName",
+    "FAMILY_SCI_NAME": "familySciName",
+    "REPORT_AS": "reportAs",
+    "EXTINCT": "extinct",
+    "EXTINCT_YEAR": "extinctYear",
+}
+
+meter = metrics.Meter(VAULT_SOURCE)
 
-session = requests.Session()
+# só o iNaturalist tem limite; eBird e Wikipedia recebem poucas requisições em lote
+session = http_cache.CachedSession(
+    limiter=HostBudgets({"api.inaturalist.org": (INAT_REQUESTS_PER_SECOND, INAT_MAX_IN_FLIGHT)}),
+    meter=meter,
+)
 session.headers.update({"User-Agent": "BirdImporter/1.0 (via iNaturalist)"})
 
 # --------------------------------------------------------
@@ -38,103 +99,245 @@ session.headers.update({"User-Agent": "BirdImporter/1.0 (via iNaturalist)"})
 def get_json(url, params=None):
     r = session.get(url, params=params, timeout=30)
     r.raise_for_status()
-    return r.json()
+    with meter.stage("parse"):
+        return r.json()
 
 def safe_filename(s):
     s = s.replace("/", "-").replace("\\", "-").replace(":", "-")
     s = s.replace("*", "").replace("?", "").replace('"', "").strip()
     return s
 
-def write_md(filename, yaml_obj, body_md=""):
-    path = os.path.join(OUTPUT_DIR, filename)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write("---\n")
-        f.write(yaml.safe_dump(yaml_obj, sort_keys=False, allow_unicode=True))
-        f.write("---\n\n")
-        f.write(body_md)
-
 # --------------------------------------------------------
-# iNaturalist: pegar imagem
+# iNaturalist: imagens de uma família inteira por requisição
 # --------------------------------------------------------
-def get_inat_image_url_by_taxon(scientific_name, per_page=1):
-    try:
-        resp = get_json(
-            "https://api.inaturalist.org/v1/observations",
-            {
-                "taxon_name": scientific_name,
-                "per_page": per_page,
-                "order_by": "observed_on",
-                "order": "desc"
-            }
-        )
-        results = resp.get("results", [])
-        if not results:
-            return None
-        obs = results[0]
-        photos = obs.get("photos", [])
-        if not photos:
-            return None
-        first_photo = photos[0]
-        for key in ("url", "medium_url", "original_url", "large_url"):
-            if key in first_photo and first_photo[key]:
-                return first_photo[key]
-        return first_photo.get("url")
-    except Exception:
-        return None
+def photo_url(photo):
+    for key in ("url", "medium_url", "original_url", "large_url"):
+        if photo.get(key):
+            return photo[key]
+    return None
+
+def get_inat_family_images(family_sci_name):
+    """default_photo de todas as espécies da família, paginando /v1/taxa."""
+    found = get_json(INAT_TAXA_URL, {"q": family_sci_name, "rank": "family", "per_page": 5})
+    family_id = next(
+        (t["id"] for t in found.get("results", []) if t["name"].lower() == family_sci_name.lower()),
+        None
+    )
+    if family_id is None:
+        return {}
+
+    images = {}
+    page = 1
+    while True:
+        data = get_json(INAT_TAXA_URL, {
+            "taxon_id": family_id,
+            "rank": "species",
+            "is_active": "true",
+            "per_page": INAT_PAGE_SIZE,
+            "page": page,
+        })
+        for taxon in data.get("results", []):
+            url = photo_url(taxon.get("default_photo") or {})
+            if url:
+                images[taxon["name"].lower()] = url
+        if page * INAT_PAGE_SIZE >= data.get("total_results", 0):
+            return images
+        page += 1
 
 # --------------------------------------------------------
-# Wikipedia: pegar imagem principal
+# Wikipedia: imagem principal de vários títulos por requisição
 # --------------------------------------------------------
-def get_wikipedia_image(scientific_name):
-    try:
-        # pegar artigo em inglês (melhor cobertura)
-        url = "https://en.wikipedia.org/w/api.php"
+def get_wikipedia_images(titles):
+    images = {}
+    for i in range(0, len(titles), WIKI_BATCH):
+        batch = titles[i:i + WIKI_BATCH]
         params = {
             "action": "query",
             "format": "json",
-            "titles": scientific_name,
+            "titles": "|".join(batch),
             "prop": "pageimages",
-            "pithumbsize": 800
+            "pithumbsize": 800,
+            "pilimit": WIKI_BATCH,
+            "redirects": 1,
         }
-        data = get_json(url, params=params)
-        pages = data.get("query", {}).get("pages", {})
-        for page in pages.values():
-            thumb = page.get("thumbnail", {}).get("source")
-            if thumb:
-                return thumb
-        return None
-    except Exception:
+        try:
+            while True:
+                data = get_json(WIKI_API_URL, params=params)
+                query = data.get("query", {})
+
+                # título final da página -> títulos pedidos
+                origin = {t: [t] for t in batch}
+                for step in query.get("normalized", []) + query.get("redirects", []):
+                    origin.setdefault(step["to"], []).extend(origin.get(step["from"], []))
+
+                for page in query.get("pages", {}).values():
+                    thumb = page.get("thumbnail", {}).get("source")
+                    if thumb:
+                        for title in origin.get(page["title"], []):
+                            images.setdefault(title, thumb)
+
+                if "continue" not in data:
+                    break
+                params.update(data["continue"])
+        except Exception as e:
+            print(f"[ERRO] Wikipedia ({batch[0]}…): {e}")
+    return images
+
+# --------------------------------------------------------
+# Resolução das capas em lote: iNaturalist e, se faltar, Wikipedia
+# --------------------------------------------------------
+def resolve_covers(birds):
+    by_family = {}
+    for b in birds:
+        by_family.setdefault(b.get("familySciName", "").strip(), []).append(b)
+
+    def family_images(family):
+        if not family:
+            return {}
+        try:
+            return get_inat_family_images(family)
+        except Exception as e:
+            print(f"[ERRO] iNaturalist ({family}): {e}")
+            return {}
+
+    print(f"[INFO] Buscando capas no iNaturalist ({len(by_family)} famílias)...")
+    covers = {}
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for family, images in zip(by_family, executor.map(family_images, by_family)):
+            for b in by_family[family]:
+                url = images.get(b.get("sciName", "").strip().lower())
+                if url:
+                    covers[b["speciesCode"]] = url
+    from_inat = len(covers)
+
+    missing = [b for b in birds if b["speciesCode"] not in covers]
+    print(f"[INFO] Buscando {len(missing)} capas restantes na Wikipedia...")
+    wiki = get_wikipedia_images(sorted({b.get("sciName", "").strip() for b in missing} - {""}))
+    for b in missing:
+        url = wiki.get(b.get("sciName", "").strip())
+        if url:
+            covers[b["speciesCode"]] = url
+
+    print(f"[INFO] Capas: {from_inat} via iNaturalist, {len(covers) - from_inat} via Wikipedia, "
+          f"{len(birds) - len(covers)} sem imagem.")
+    return covers
+
+# --------------------------------------------------------
+# EBIRD TAXONOMY (CSV versionado em cache local, lido em streaming)
+# --------------------------------------------------------
+def ebird_taxonomy_version():
+    try:
+        versions = get_json(EBIRD_VERSIONS_URL)
+        return str(next(v["authorityVer"] for v in versions if v.get("latest")))
+    except Exception as e:
+        print(f"[AVISO] Não foi possível consultar a versão da taxonomia: {e}")
         return None
 
+def ebird_taxonomy_file(locale=None):
+    """Caminho do CSV da taxonomia da versão atual, baixando se preciso."""
+    os.makedirs(TAXONOMY_DIR, exist_ok=True)
+    version = ebird_taxonomy_version()
+    suffix = f"_{locale}.csv" if locale else ".csv"
+
+    if version is None:
+        # sem rede: usa a versão mais recente já baixada
+        pattern = re.compile(r"ebird_taxonomy_[\d.]+" + re.escape(suffix))
+        cached = sorted(f for f in os.listdir(TAXONOMY_DIR) if pattern.fullmatch(f))
+        if not cached:
+            raise RuntimeError("taxonomia eBird indisponível e sem cópia local")
+        return os.path.join(TAXONOMY_DIR, cached[-1])
+
+    path = os.path.join(TAXONOMY_DIR, f"ebird_taxonomy_{version}{suffix}")
+    if not os.path.exists(path):
+        print(f"[INFO] Baixando taxonomia eBird {version} {locale or ''}".rstrip() + " (pode demorar)...")
+        params = {"fmt": "csv", "locale": locale} if locale else {"fmt": "csv"}
+        with session.get(EBIRD_TAXONOMY_URL, params=params, stream=True, timeout=120) as r:
+            r.raise_for_status()
+            with open(path + ".tmp", "wb") as f:
+                for chunk in r.iter_content(chunk_size=1 << 16):
+                    f.write(chunk)
+        os.replace(path + ".tmp", path)
+    return path
+
+def iter_ebird_taxonomy(path, categories=None, orders=None, families=None):
+    """Registros do CSV da taxonomia (`path`) um a um, no formato da API JSON do eBird."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            rec = {key: row[col].strip() for col, key in TAXONOMY_CSV_FIELDS.items() if row.get(col)}
+            if categories and rec.get("category") not in categories:
+                continue
+            if orders and rec.get("order") not in orders:
+                continue
+            if families and not ({rec.get("familySciName"), rec.get("familyComName")} & set(families)):
+                continue
+            yield rec
+
+def join_locale_names(birds, locale_files):
+    """Preenche bird["localNames"][locale] lendo cada taxonomia localizada
+    (`locale_files`: locale -> CSV) uma vez."""
+    by_code = {b["speciesCode"]: b for b in birds}
+    for locale, path in locale_files.items():
+        found = 0
+        for rec in iter_ebird_taxonomy(path):
+            b = by_code.get(rec.get("speciesCode"))
+            # o eBird devolve o nome em inglês quando não há tradução
+            if b and rec.get("comName") and rec["comName"] != b.get("comName"):
+                b.setdefault("localNames", {})[locale] = rec["comName"]
+                found += 1
+        print(f"[INFO] Nomes {locale}: {found} de {len(birds)} espécies.")
+
 # --------------------------------------------------------
-# EBIRD TAXONOMY
+# Pré-seleção por categoria (antes de qualquer busca de imagem)
 # --------------------------------------------------------
-def load_ebird_taxonomy():
-    print("[INFO] Baixando taxonomia eBird (pode demorar)...")
-    url = "https://api.ebird.org/v2/ref/taxonomy/ebird?fmt=json"
-    data = get_json(url)
-    print(f"[INFO] {len(data)} espécies carregadas.")
-    return data
+def plan_taxa(records, processed, note_categories, fold_categories, only=None):
+    """Separa os táxons que viram nota dos que entram na nota da espécie-mãe.
+
+    Categorias em `fold_categories` (ISSF, forma, doméstica...) são anexadas à
+    espécie indicada em reportAs; as demais (híbridos, spuhs, slashes) são
+    descartadas. Só notas ainda fora do vault (`processed`: códigos já com
+    nota; e, se `only` for dado, com código em `only`) são devolvidas.
+    """
+    seen = 0
+    pending = []
+    folded = {}
+    dropped = {}
+
+    for b in records:
+        seen += 1
+        category = b.get("category", "species")
+        if category in note_categories:
+            code = b.get("speciesCode", "")
+            if code not in processed and (only is None or code in only):
+                pending.append(b)
+        elif category in fold_categories and b.get("reportAs"):
+            folded.setdefault(b["reportAs"], []).append(b)
+        else:
+            dropped[category] = dropped.get(category, 0) + 1
+
+    attached = 0
+    for b in pending:
+        b["related"] = folded.get(b["speciesCode"], [])
+        attached += len(b["related"])
+
+    print(f"[INFO] {seen} táxons lidos — {len(pending)} notas pendentes, "
+          f"{attached} táxons anexados à espécie, {sum(dropped.values())} descartados "
+          f"({', '.join(f'{k}: {v}' for k, v in sorted(dropped.items())) or '-'})")
+    return pending
 
 # --------------------------------------------------------
 # Função principal de processamento de cada pássaro
 # --------------------------------------------------------
-def process_bird(bird, processed_set):
+def process_bird(bird, covers):
     sci_name = bird.get("sciName", "").strip()
     com_name_en = bird.get("comName", "").strip()
     family = bird.get("familyComName", "").strip()
     order = bird.get("order", "").strip()
     species_code = bird.get("speciesCode", "").strip()
-    com_name_pt = bird.get("comNamePt", "").strip()
+    local_names = bird.get("localNames", {})
+    com_name_pt = local_names.get("pt_BR", "")
 
-    if species_code in processed_set:
-        print(f"[SKIP] {com_name_en} — já processado")
-        return species_code
-
-    # buscar imagem: primeiro iNaturalist, depois Wikipedia
-    cover_url = get_inat_image_url_by_taxon(sci_name)
-    if not cover_url:
-        cover_url = get_wikipedia_image(sci_name)
+    # imagem já resolvida em lote: primeiro iNaturalist, depois Wikipedia
+    cover_url = covers.get(species_code)
 
     yaml_obj = {
         "type": "animals",
@@ -150,6 +353,15 @@ def process_bird(bird, processed_set):
         "coverUrl": cover_url,
         "image": cover_url,
     }
+    other_names = {k: v for k, v in local_names.items() if k != "pt_BR"}
+    if other_names:
+        yaml_obj["common_names"] = other_names
+    related = [
+        {"name": r.get("comName", ""), "scientific_name": r.get("sciName", ""), "category": r.get("category", "")}
+        for r in bird.get("related", [])
+    ]
+    if related:
+        yaml_obj["related_taxa"] = related
 
     fname = safe_filename(f"{com_name_en}.md")
     md_body = f"# {com_name_en}\n\n"
@@ -158,41 +370,169 @@ def process_bird(bird, processed_set):
     md_body += f"**Nome científico:** *{sci_name}*\n\n"
     md_body += f"**Família:** {family}\n\n"
     md_body += f"**Ordem:** {order}\n\n"
+    if related:
+        md_body += "**Táxons relacionados:**\n\n"
+        for r in related:
+            md_body += f"- {r['name']} (*{r['scientific_name']}*) — {r['category']}\n"
+        md_body += "\n"
     if cover_url:
         md_body += f"![image]({cover_url})\n"
 
-    write_md(fname, yaml_obj, md_body)
-    print(f"[OK] {com_name_en} — cover: {bool(cover_url)}")
-    return species_code
+    return species_code, fname, vault_writer.render_md(yaml_obj, md_body)
+
+def render_stored(blobs):
+    """Roda num processo (--render-only): aves guardadas -> (código, arquivo, texto)."""
+    rendered = []
+    for blob in blobs:
+        payload = raw_store.decode(blob)
+        bird = payload["bird"]
+        rendered.append(process_bird(bird, {bird["speciesCode"]: payload["cover"]}))
+    return rendered
+
+# --------------------------------------------------------
+# Capas não encontradas (cache negativo com backoff por táxon)
+# --------------------------------------------------------
+def record_cover(misses, species_code, found):
+    if found:
+        misses.discard(species_code)
+        return
+    prev = misses.get(species_code) or {}
+    misses.add(species_code, {
+        "ts": int(time.time()),
+        "sources": list(COVER_SOURCES),
+        "attempts": prev.get("attempts", 0) + 1,
+    })
+
+def seed_misses(misses):
+    """No primeiro uso do journal (sem snapshot nem log), as notas do vault com
+    coverUrl nulo entram como uma tentativa sem capa, datada pelo mtime da
+    nota; assim as notas gravadas antes do journal também voltam no
+    --refresh-missing."""
+    if misses.entries or os.path.exists(misses.path) or os.path.getsize(misses.log_path):
+        return
+    for _, entry in iter_notes(OUTPUT_DIR):
+        with open(entry.path, "r", encoding="utf-8", errors="replace") as f:
+            fields = frontmatter_fields(f.read(), ("subType", "id", "coverUrl"))
+        if fields.get("subType") == "bird" and "id" in fields and "coverUrl" not in fields:
+            misses.add(fields["id"], {
+                "ts": int(entry.stat().st_mtime),
+                "sources": list(COVER_SOURCES),
+                "attempts": 1,
+            })
+    if misses.entries:
+        print(f"[INFO] Journal de capas iniciado com {len(misses)} notas sem capa do vault.")
+
+def due_misses(misses):
+    """Códigos cuja última tentativa é mais velha que MISS_TTL * 2^(tentativas-1)."""
+    now = time.time()
+    return {
+        code for code, miss in misses.entries.items()
+        if now - miss["ts"] >= MISS_TTL * 2 ** min(miss["attempts"] - 1, MISS_MAX_DOUBLINGS)
+    }
 
 # --------------------------------------------------------
 # Main
 # --------------------------------------------------------
-def main():
-    birds = load_ebird_taxonomy()
+def main(note_categories=NOTE_CATEGORIES, fold_categories=FOLD_CATEGORIES, orders=None, families=None,
+         locales=LOCALES, refresh_missing=False, render_only=False, refresh=False):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if render_only:
+        writer = raw_store.render_all(
+            VAULT_SOURCE, render_stored, lambda w, r: w.submit(os.path.join(OUTPUT_DIR, r[1]), r[2]),
+            PARSE_WORKERS, chunk=RENDER_CHUNK, meter=meter,
+        )
+        print(f"[INFO] Notas: {writer.summary()}")
+        meter.finish(notes=writer.stats)
+        return
 
-    # carregar checkpoint
-    if os.path.exists(CHECKPOINT_FILE):
-        with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
-            processed = set(json.load(f))
-    else:
-        processed = set()
+    # o que já está no vault (e não um checkpoint que pode divergir dele)
+    with VaultIndex() as vault:
+        print(f"[INFO] Vault: {scan_summary(vault.scan(VAULT_SOURCE, OUTPUT_DIR))}")
+        processed = vault.ids(VAULT_SOURCE)
+    misses = Journal(MISSES_FILE)
+    seed_misses(misses)
 
-    total = len(birds)
-    print(f"[INFO] Começando importação — {len(processed)} já processados.")
+    # conferir a versão e baixar os CSVs é rede; só a leitura entra em "parse"
+    with meter.stage("fetch"):
+        taxonomy_file = ebird_taxonomy_file()
+        locale_files = {locale: ebird_taxonomy_file(locale) for locale in locales}
 
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        future_to_species = {executor.submit(process_bird, b, processed): b for b in birds}
+    # filtra por categoria e pelo vault enquanto lê a taxonomia:
+    # só os pendentes ficam em memória
+    records = iter_ebird_taxonomy(taxonomy_file, orders=orders, families=families)
+    with meter.stage("parse"):
+        if refresh_missing:
+            due = due_misses(misses)
+            print(f"[INFO] Modo refresh: {len(due)} de {len(misses)} espécies sem capa vencidas.")
+            pending = plan_taxa(records, (), note_categories, fold_categories, only=due)
+        else:
+            pending = plan_taxa(records, () if refresh else processed, note_categories, fold_categories)
+        join_locale_names(pending, locale_files)
+
+    covers = resolve_covers(pending)
+
+    if refresh_missing:
+        # só as notas que ganharam capa são reescritas
+        for b in pending:
+            if b["speciesCode"] not in covers:
+                record_cover(misses, b["speciesCode"], False)
+        pending = [b for b in pending if b["speciesCode"] in covers]
 
-        for future in as_completed(future_to_species):
-            species_code = future.result()
-            if species_code:
-                processed.add(species_code)
-                # salvar checkpoint incremental
-                with open(CHECKPOINT_FILE, "w", encoding="utf-8") as f:
-                    json.dump(list(processed), f, ensure_ascii=False, indent=2)
+    # o táxon já resolvido (nomes, capa) fica guardado para o --render-only
+    with RawStore(VAULT_SOURCE) as store:
+        for b in pending:
+            store.put(b["speciesCode"], {"bird": b, "cover": covers.get(b["speciesCode"])})
 
+    # notas renderizadas nas threads; a gravação (só do que mudou), o
+    # registro das capas e o [OK] de cada ave ficam com a thread do writer
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor, vault_writer.BatchWriter(meter=meter) as writer:
+        rendered = bounded_map(executor, metrics.timed(process_bird), pending, MAX_IN_FLIGHT, covers)
+        for seconds, (species_code, fname, text) in rendered:
+            meter.add_stage("render", seconds)
+
+            def saved(_, code=species_code, name=os.path.splitext(fname)[0]):
+                record_cover(misses, code, code in covers)
+                print(f"[OK] {name} — cover: {code in covers}")
+
+            writer.submit(os.path.join(OUTPUT_DIR, fname), text, on_done=saved)
+
+    misses.close()
+
+    print(f"[INFO] Notas: {writer.summary()}")
+
+    print(f"[INFO] Cache HTTP: {session.cache_summary()}")
+    meter.finish(notes=writer.stats, cache=session.stats)
     print("\n=== IMPORTAÇÃO DE AVES FINALIZADA ===")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Importador de aves -> Obsidian")
+    parser.add_argument("--category", action="append", dest="note_categories",
+                        help=f"categoria eBird que vira nota (padrão: {', '.join(NOTE_CATEGORIES)}); pode repetir")
+    parser.add_argument("--fold-category", action="append", dest="fold_categories",
+                        help=f"categoria anexada à espécie-mãe (padrão: {', '.join(FOLD_CATEGORIES)}); pode repetir")
+    parser.add_argument("--order", action="append", dest="orders",
+                        help="ordem a importar (ex.: Passeriformes); pode repetir")
+    parser.add_argument("--family", action="append", dest="families",
+                        help="família a importar (nome científico ou comum); pode repetir")
+    parser.add_argument("--refresh-missing", action="store_true",
+                        help="reconsulta só as espécies sem capa cujo prazo de nova tentativa venceu")
+    parser.add_argument("--locale", action="append", dest="locales",
+                        help=f"locale eBird extra para nomes comuns, além de {', '.join(LOCALES)}; pode repetir")
+    parser.add_argument("--refresh", action="store_true",
+                        help="reprocessa espécies que já têm nota (grava só o que mudou)")
+    parser.add_argument("--render-only", action="store_true",
+                        help="regenera as notas a partir dos dados já baixados, sem rede")
+    parser.add_argument("--profile", action="store_true",
+                        help="roda sob o cProfile e grava as estatísticas junto das métricas")
+    args = parser.parse_args()
+    args.note_categories = args.note_categories or NOTE_CATEGORIES
+    args.fold_categories = args.fold_categories or FOLD_CATEGORIES
+    args.locales = LOCALES + tuple(l for l in args.locales or () if l not in LOCALES)
+    return args
+
 if __name__ == "__main__":
-    main()
+    args = vars(parse_args())
+    if args.pop("profile"):
+        metrics.profile(VAULT_SOURCE, main, **args)
+    else:
+        main(**args)
@@ -6,9 +6,20 @@ Compatível com Windows (UTF-8 garantido)
 
 import os
 import time
-import requests
-import yaml
 import sys
+import json
+import threading
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import http_cache
+import metrics
+import raw_store
+import vault_writer
+from journal import Journal
+from raw_store import RawStore
+from rate_limit import RateLimiter
+from vault_index import VaultIndex, scan_summary
 
 # --------------------------------------------------------
 # CONFIG (Windows)
@@ -24,12 +35,28 @@ OUTPUT_DIR = (
     r"C:\Users\Usuario\Documents\Gnosis\3- Bem estar\Hobbies e Inspirações\Coleções\Creatures (Fiction)\Pokemons"
 )
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
 POKEAPI_BASE = "https://pokeapi.co/api/v2"
-SLEEP_BETWEEN = 0.11
 
-session = requests.Session()
+# concorrência: todas as requisições de rede dividem o mesmo token bucket
+REQUESTS_PER_SECOND = 10
+MAX_IN_FLIGHT = 8
+MAX_WORKERS = 8
+PARSE_WORKERS = os.cpu_count() or 1  # processos do --render-only
+RENDER_CHUNK = 16  # species por tarefa no --render-only
+
+# snapshot local da tabela de tipos; mude a versão para forçar reconstrução
+TYPE_CHART_FILE = os.path.join(OUTPUT_DIR, "type_chart.json")
+TYPE_CHART_VERSION = 1
+
+# journal de retomada: species concluídas + hash de cada arquivo gerado
+CHECKPOINT_FILE = os.path.join(OUTPUT_DIR, "checkpoint.json")
+VAULT_SOURCE = "pokemon"  # nome da fonte no vault_index
+
+meter = metrics.Meter(VAULT_SOURCE)
+
+session = http_cache.CachedSession(
+    limiter=RateLimiter(REQUESTS_PER_SECOND, max_in_flight=MAX_IN_FLIGHT), meter=meter
+)
 session.headers.update({"User-Agent": "PokemonImporter-Windows-UTF8/3.1"})
 
 
@@ -40,7 +67,8 @@ session.headers.update({"User-Agent": "PokemonImporter-Windows-UTF8/3.1"})
 def get_json(url):
     r = session.get(url, timeout=30)
     r.raise_for_status()
-    return r.json()
+    with meter.stage("parse"):
+        return r.json()
 
 
 def safe_title(s):
@@ -49,20 +77,14 @@ def safe_title(s):
     return s.replace("-", " ").replace("_", " ").title()
 
 
-def write_md(filename, yaml_obj, body_md=""):
-    path = os.path.join(OUTPUT_DIR, filename)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write("---\n")
-        f.write(yaml.safe_dump(yaml_obj, sort_keys=False, allow_unicode=True))
-        f.write("---\n\n")
-        if body_md:
-            f.write(body_md)
-
-
 # --------------------------------------------------------
-# TABELA DE TIPOS
+# TABELA DE TIPOS (carregada sob demanda, não no import)
 # --------------------------------------------------------
 
+_type_profiles = None
+_type_lock = threading.Lock()
+
+
 def build_type_chart():
     print("[INFO] Construindo tabela de tipos...")
     types = get_json(f"{POKEAPI_BASE}/type?limit=1000")["results"]
@@ -80,31 +102,87 @@ def build_type_chart():
             "zero_from": [x["name"] for x in rel["no_damage_from"]],
         }
 
-        time.sleep(SLEEP_BETWEEN)
-
     return chart
 
 
-TYPE_CHART = build_type_chart()
-ALL_TYPES = list(TYPE_CHART.keys())
-
-
-def calc_type_effectiveness(pokemon_types):
-    result = {t: 1.0 for t in ALL_TYPES}
-
-    for ptype in pokemon_types:
-        rel = TYPE_CHART.get(ptype.lower())
-        if not rel:
-            continue
+def build_type_table(chart):
+    """Matriz densa defensor x atacante com o multiplicador de dano recebido."""
+    types = list(chart.keys())
+    idx = {t: i for i, t in enumerate(types)}
 
+    matrix = [[1.0] * len(types) for _ in types]
+    for name, rel in chart.items():
+        row = matrix[idx[name]]
         for t in rel["double_from"]:
-            result[t] *= 2
+            row[idx[t]] *= 2
         for t in rel["half_from"]:
-            result[t] *= 0.5
+            row[idx[t]] *= 0.5
         for t in rel["zero_from"]:
-            result[t] *= 0
+            row[idx[t]] *= 0
+
+    return {
+        "version": TYPE_CHART_VERSION,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "types": types,
+        "matrix": matrix,
+    }
 
-    return {k.title(): v for k, v in result.items()}
+
+def build_type_profiles(table):
+    types = table["types"]
+    matrix = table["matrix"]
+    labels = [t.title() for t in types]
+
+    def profile(rows):
+        mult = [1.0] * len(types)
+        for row in rows:
+            mult = [m * x for m, x in zip(mult, matrix[row])]
+        return dict(zip(labels, mult))
+
+    profiles = {frozenset(): profile([])}
+    for i, a in enumerate(types):
+        profiles[frozenset([a])] = profile([i])
+        for j in range(i + 1, len(types)):
+            profiles[frozenset([a, types[j]])] = profile([i, j])
+
+    return profiles
+
+
+def load_type_table():
+    if os.path.exists(TYPE_CHART_FILE):
+        with open(TYPE_CHART_FILE, "r", encoding="utf-8") as f:
+            table = json.load(f)
+        if table.get("version") == TYPE_CHART_VERSION:
+            return table
+
+    table = build_type_table(build_type_chart())
+    with open(TYPE_CHART_FILE, "w", encoding="utf-8") as f:
+        json.dump(table, f, ensure_ascii=False)
+    print(f"[INFO] Tabela de tipos salva em {TYPE_CHART_FILE}")
+    return table
+
+
+def get_type_profiles():
+    global _type_profiles
+    with _type_lock:
+        if _type_profiles is None:
+            _type_profiles = build_type_profiles(load_type_table())
+    return _type_profiles
+
+
+def calc_type_effectiveness(pokemon_types):
+    profiles = get_type_profiles()
+    known = frozenset(t.lower() for t in pokemon_types if frozenset([t.lower()]) in profiles)
+
+    if known in profiles:
+        return dict(profiles[known])
+
+    # três tipos ou mais (não existe na API hoje): combina os perfis simples
+    result = dict(profiles[frozenset()])
+    for t in known:
+        for k, v in profiles[frozenset([t])].items():
+            result[k] *= v
+    return result
 
 
 # --------------------------------------------------------
@@ -168,154 +246,355 @@ def parse_moves(pjson):
 
 
 # --------------------------------------------------------
-# PROGRAMA PRINCIPAL
+# PLANEJAMENTO (cada species / cadeia / variedade uma única vez)
 # --------------------------------------------------------
 
-def main():
+def fetch_species(url):
+    species = get_json(url)
+
+    flavor_entries = []
+    for ft in species["flavor_text_entries"]:
+        if ft["language"]["name"] == "en":
+            txt = ft["flavor_text"].replace("\n", " ").replace("\f", " ").strip()
+            flavor_entries.append({"version": ft["version"]["name"], "text": txt})
+
+    return {
+        "id": species["id"],
+        "name": species["name"],
+        "generation": safe_title(species["generation"]["name"]),
+        "color": safe_title(species["color"]["name"]),
+        "habitat": safe_title(species["habitat"]["name"]) if species.get("habitat") else "",
+        "genus": next(
+            (g["genus"] for g in species["genera"] if g["language"]["name"] == "en"),
+            ""
+        ),
+        "flavor_entries": flavor_entries,
+        "evolution_chain_url": (species.get("evolution_chain") or {}).get("url"),
+        "default_variety": next(
+            (v["pokemon"]["name"] for v in species["varieties"] if v["is_default"]),
+            species["name"]
+        ),
+        "variety_urls": [v["pokemon"]["url"] for v in species["varieties"]],
+    }
+
+
+def fetch_evolution_chain(url):
+    chain = get_json(url)
+    evo_chain = []
 
-    print("[INFO] Baixando lista completa de Pokémon...")
-    master = get_json(f"{POKEAPI_BASE}/pokemon?limit=20000")["results"]
+    def walk(node):
+        evo_chain.append(safe_title(node["species"]["name"]))
+        for nxt in node["evolves_to"]:
+            walk(nxt)
 
-    for entry in master:
-        name_raw = entry["name"]
+    walk(chain["chain"])
+    return evo_chain
 
+
+def _try(fn, label):
+    def run(arg):
         try:
-            p = get_json(entry["url"])
-            species = get_json(p["species"]["url"])
+            return fn(arg)
+        except Exception as e:
+            print(f"[ERRO] {label} {arg}: {e}")
+            return None
+    return run
 
-            generation = safe_title(species["generation"]["name"])
-            color = safe_title(species["color"]["name"])
-            habitat = safe_title(species["habitat"]["name"]) if species.get("habitat") else ""
 
-            genus = next(
-                (g["genus"] for g in species["genera"] if g["language"]["name"] == "en"),
-                ""
-            )
+def url_id(url):
+    return int(url.rstrip("/").rsplit("/", 1)[1])
+
+
+def list_species_urls(generation=None, id_range=None):
+    if generation:
+        found = get_json(f"{POKEAPI_BASE}/generation/{generation}")["pokemon_species"]
+    else:
+        found = get_json(f"{POKEAPI_BASE}/pokemon-species?limit=20000")["results"]
+
+    urls = sorted((s["url"] for s in found), key=url_id)
+    if id_range:
+        lo, hi = id_range
+        urls = [u for u in urls if lo <= url_id(u) <= hi]
+    return urls
+
+
+def plan_import(executor, species_urls):
+    """Monta o conjunto único de species, cadeias e variedades a baixar."""
+    print(f"[INFO] Baixando {len(species_urls)} species...")
+    species = [s for s in executor.map(_try(fetch_species, "Species"), species_urls) if s]
+
+    chain_urls = sorted({s["evolution_chain_url"] for s in species if s["evolution_chain_url"]})
+    print(f"[INFO] Baixando {len(chain_urls)} cadeias evolutivas...")
+    chains = dict(zip(chain_urls, executor.map(_try(fetch_evolution_chain, "Cadeia"), chain_urls)))
+
+    # a mesma variedade nunca é baixada/escrita duas vezes
+    seen = set()
+    for s in species:
+        s["variety_urls"] = [u for u in s["variety_urls"] if not (u in seen or seen.add(u))]
+
+    report_plan(species, chains, len(species_urls))
+    return species, chains
+
 
-            flavor_entries = []
-            for ft in species["flavor_text_entries"]:
-                if ft["language"]["name"] == "en":
-                    txt = ft["flavor_text"].replace("\n", " ").replace("\f", " ").strip()
-                    flavor_entries.append({"version": ft["version"]["name"], "text": txt})
+def report_plan(species, chains, n_species):
+    """Compara o plano com o laço antigo (lista mestre -> species -> variedades).
 
-            evo_chain = []
-            if species.get("evolution_chain"):
-                chain = get_json(species["evolution_chain"]["url"])
+    O laço antigo, para cada variedade da lista mestre, baixava o pokemon, a
+    species, a cadeia e todas as variedades da species, e gravava todas;
+    a conta sai das species já baixadas, sem pedir a lista mestre.
+    """
+    varieties = [s for s in species for _ in s["variety_urls"]]
+    naive_requests = 1 + sum(2 + bool(s["evolution_chain_url"]) + len(s["variety_urls"]) for s in varieties)
+    naive_writes = sum(len(s["variety_urls"]) for s in varieties)
 
-                def walk(node):
-                    evo_chain.append(safe_title(node["species"]["name"]))
-                    for nxt in node["evolves_to"]:
-                        walk(nxt)
+    requests_now = 1 + n_species + len(chains) + len(varieties)
+    writes_now = len(varieties)
+    print(
+        f"[INFO] Plano: {n_species} species, {len(chains)} cadeias, {len(varieties)} variedades — "
+        f"{requests_now} requisições (antes {naive_requests}, {requests_now - naive_requests:+d}), "
+        f"{writes_now} arquivos (antes {naive_writes}, {writes_now - naive_writes:+d})"
+    )
 
-                walk(chain["chain"])
 
-            for var in species["varieties"]:
-                pv = get_json(var["pokemon"]["url"])
-                time.sleep(SLEEP_BETWEEN)
+# --------------------------------------------------------
+# RENDERIZAÇÃO
+# --------------------------------------------------------
 
-                var_name_raw = pv["name"]
-                var_name = safe_title(var_name_raw)
+def render_variety(info, evo_chain, pv):
+    var_name_raw = pv["name"]
+    var_name = safe_title(var_name_raw)
 
-                form_key, form_label = classify_form_name(var_name_raw, name_raw)
+    form_key, form_label = classify_form_name(var_name_raw, info["default_variety"])
 
-                pid = species["id"]
-                base_name = safe_title(species["name"])
+    pid = info["id"]
+    base_name = safe_title(info["name"])
 
-                final_name = (
-                    base_name if form_key == "default"
-                    else f"{base_name} ({form_label or var_name})"
-                )
+    final_name = (
+        base_name if form_key == "default"
+        else f"{base_name} ({form_label or var_name})"
+    )
 
-                sprites = pv["sprites"]
-                official = sprites.get("other", {}).get("official-artwork", {}).get("front_default")
-                sprite_default = sprites.get("front_default")
-                sprite_shiny = sprites.get("front_shiny")
+    sprites = pv["sprites"]
+    official = sprites.get("other", {}).get("official-artwork", {}).get("front_default")
+    sprite_default = sprites.get("front_default")
+    sprite_shiny = sprites.get("front_shiny")
 
-                types = [t["type"]["name"].title() for t in pv["types"]]
+    types = [t["type"]["name"].title() for t in pv["types"]]
 
-                stats_raw = {s["stat"]["name"]: s["base_stat"] for s in pv["stats"]}
-                total = sum(stats_raw.values())
+    stats_raw = {s["stat"]["name"]: s["base_stat"] for s in pv["stats"]}
+    total = sum(stats_raw.values())
 
-                abilities = [a["ability"]["name"].replace("-", " ").title() for a in pv["abilities"]]
+    abilities = [a["ability"]["name"].replace("-", " ").title() for a in pv["abilities"]]
 
-                moves = parse_moves(pv)
+    moves = parse_moves(pv)
 
-                height_m = pv["height"] / 10
-                weight_kg = pv["weight"] / 10
+    height_m = pv["height"] / 10
+    weight_kg = pv["weight"] / 10
 
-                type_eff = calc_type_effectiveness([t.lower() for t in types])
+    type_eff = calc_type_effectiveness([t.lower() for t in types])
 
-                # --------------------------------------------------------
-                # YAML FINAL (agora com coverUrl)
-                # --------------------------------------------------------
+    # --------------------------------------------------------
+    # YAML FINAL (agora com coverUrl)
+    # --------------------------------------------------------
 
-                yaml_obj = {
-                    "type": "creatures",
-                    "subType": "pokemon",
-                    "id": pid,
-                    "dex_id": pid,
+    yaml_obj = {
+        "type": "creatures",
+        "subType": "pokemon",
+        "id": pid,
+        "dex_id": pid,
 
-                    "name": final_name,
-                    "species_name": base_name,
+        "name": final_name,
+        "species_name": base_name,
 
-                    "form_of": base_name if form_key != "default" else None,
-                    "form_type": form_label if form_key != "default" else None,
+        "form_of": base_name if form_key != "default" else None,
+        "form_type": form_label if form_key != "default" else None,
 
-                    "coverUrl": official or sprite_default or sprite_shiny,
+        "coverUrl": official or sprite_default or sprite_shiny,
 
-                    "image": official or sprite_default or sprite_shiny,
-                    "sprites": {
-                        "official_artwork": official,
-                        "default": sprite_default,
-                        "shiny": sprite_shiny,
-                    },
+        "image": official or sprite_default or sprite_shiny,
+        "sprites": {
+            "official_artwork": official,
+            "default": sprite_default,
+            "shiny": sprite_shiny,
+        },
 
-                    "types": types,
-                    "generation": generation,
-                    "color": color,
-                    "category": genus,
-                    "habitat": habitat,
+        "types": types,
+        "generation": info["generation"],
+        "color": info["color"],
+        "category": info["genus"],
+        "habitat": info["habitat"],
 
-                    "height_m": height_m,
-                    "weight_kg": weight_kg,
+        "height_m": height_m,
+        "weight_kg": weight_kg,
 
-                    "abilities": abilities,
+        "abilities": abilities,
 
-                    "stats": {
-                        "total": total,
-                        "hp": stats_raw.get("hp"),
-                        "attack": stats_raw.get("attack"),
-                        "defense": stats_raw.get("defense"),
-                        "special_attack": stats_raw.get("special-attack"),
-                        "special_defense": stats_raw.get("special-defense"),
-                        "speed": stats_raw.get("speed"),
-                    },
+        "stats": {
+            "total": total,
+            "hp": stats_raw.get("hp"),
+            "attack": stats_raw.get("attack"),
+            "defense": stats_raw.get("defense"),
+            "special_attack": stats_raw.get("special-attack"),
+            "special_defense": stats_raw.get("special-defense"),
+            "speed": stats_raw.get("speed"),
+        },
+
+        "moves": moves,
+        "pokedex_entries": info["flavor_entries"],
+        "type_effectiveness": type_eff,
+        "evolution_chain": evo_chain,
+    }
 
-                    "moves": moves,
-                    "pokedex_entries": flavor_entries,
-                    "type_effectiveness": type_eff,
-                    "evolution_chain": evo_chain,
-                }
+    yaml_obj = {k: v for k, v in yaml_obj.items() if v is not None}
 
-                yaml_obj = {k: v for k, v in yaml_obj.items() if v is not None}
+    fname = f"{pid:04d} - {final_name}.md"
+    fname = fname.replace("/", "-").replace("\\", "-")
 
-                fname = f"{pid:04d} - {final_name}.md"
-                fname = fname.replace("/", "-").replace("\\", "-")
+    md_body = f"# {final_name}\n\n"
+    md_body += f"**Types:** {', '.join(types)}\n\n"
+    md_body += f"**Abilities:** {', '.join(abilities)}\n\n"
 
-                md_body = f"# {final_name}\n\n"
-                md_body += f"**Types:** {', '.join(types)}\n\n"
-                md_body += f"**Abilities:** {', '.join(abilities)}\n\n"
+    return fname, yaml_obj, md_body
 
-                write_md(fname, yaml_obj, md_body)
 
-                print(f"[OK] {fname} salvo.")
+# --------------------------------------------------------
+# PROGRAMA PRINCIPAL
+# --------------------------------------------------------
 
+def render_species(payload):
+    """Notas (arquivo, texto) de uma species a partir do que foi baixado; sem rede."""
+    info, evo_chain = payload["info"], payload["evo_chain"]
+    notes = []
+    ok = True
+    for pv in payload["varieties"]:
+        try:
+            fname, yaml_obj, md_body = render_variety(info, evo_chain, pv)
+            notes.append((fname, vault_writer.render_md(yaml_obj, md_body)))
         except Exception as e:
-            print(f"[ERRO] Pokémon {name_raw}: {e}")
-            time.sleep(0.5)
+            print(f"[ERRO] Pokémon {pv.get('name')}: {e}")
+            ok = False
+    return notes, ok
 
+
+def render_stored(blobs):
+    """Roda num processo (--render-only): species guardadas -> (id, notas, ok)."""
+    rendered = []
+    for blob in blobs:
+        payload = raw_store.decode(blob)
+        rendered.append((str(payload["info"]["id"]), *render_species(payload)))
+    return rendered
+
+
+def process_species(info, chains, done, writer, on_disk, store):
+    payload = {"info": info, "evo_chain": chains.get(info["evolution_chain_url"]) or [], "varieties": []}
+    ok = True
+
+    for url in info["variety_urls"]:
+        try:
+            payload["varieties"].append(get_json(url))
+        except Exception as e:
+            print(f"[ERRO] Pokémon {url}: {e}")
+            ok = False
+
+    # só species completas vão para o armazém do --render-only
+    if ok:
+        store.put(info["id"], payload)
+    with meter.stage("render"):
+        notes, rendered_ok = render_species(payload)
+    save_species(str(info["id"]), notes, ok and rendered_ok, done, writer, on_disk)
+
+
+def save_species(key, notes, ok, done, writer, on_disk):
+    files = {fname: vault_writer.content_hash(text) for fname, text in notes}
+
+    def written(results):
+        for (fname, _), wrote in zip(notes, results):
+            print(f"[OK] {fname} salvo." if wrote else f"[SKIP] {fname} — sem mudanças")
+        # só entra no journal se todas as variedades foram gravadas
+        if ok:
+            done.add(key, files)
+
+    writer.submit_many(
+        [(os.path.join(OUTPUT_DIR, fname), text, on_disk.get(fname)) for fname, text in notes],
+        written,
+    )
+
+
+def main(workers=MAX_WORKERS, generation=None, id_range=None, refresh=False, render_only=False):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    get_type_profiles()
+    done = Journal(CHECKPOINT_FILE)
+
+    # o journal diz que arquivos cada species gerou; o índice do vault diz
+    # se eles ainda existem (species com nota apagada voltam para a fila)
+    with VaultIndex() as vault:
+        print(f"[INFO] Vault: {scan_summary(vault.scan(VAULT_SOURCE, OUTPUT_DIR))}")
+        on_disk = vault.hashes(VAULT_SOURCE)
+
+    def in_vault(key):
+        return key in done and all(fname in on_disk for fname in done.get(key) or ())
+
+    if render_only:
+        writer = raw_store.render_all(
+            VAULT_SOURCE, render_stored, lambda w, r: save_species(*r, done, w, on_disk), PARSE_WORKERS,
+            {"import_pokemon.TYPE_CHART_FILE": TYPE_CHART_FILE}, RENDER_CHUNK, meter,
+        )
+        done.close()
+        print(f"[INFO] Notas: {writer.summary()}")
+        meter.finish(notes=writer.stats)
+        return
+
+    species_urls = list_species_urls(generation, id_range)
+    if not refresh:
+        species_urls = [u for u in species_urls if not in_vault(str(url_id(u)))]
+    print(f"[INFO] {len(done)} species no journal; {len(species_urls)} a processar.")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, vault_writer.BatchWriter(meter=meter) as writer, \
+            RawStore(VAULT_SOURCE) as store:
+        species, chains = plan_import(executor, species_urls)
+        for _ in executor.map(lambda s: process_species(s, chains, done, writer, on_disk, store), species):
+            pass
+
+    done.close()
+    print(f"[INFO] Notas: {writer.summary()}")
+
+    print(f"[INFO] Cache HTTP: {session.cache_summary()}")
+    meter.finish(notes=writer.stats, cache=session.stats)
     print("\n=== IMPORTAÇÃO FINALIZADA ===")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Importador PokeAPI -> Obsidian")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="entradas processadas em paralelo (1 = sequencial)")
+    parser.add_argument("--rps", type=float, default=REQUESTS_PER_SECOND,
+                        help="requisições por segundo à PokeAPI")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT,
+                        help="máximo de requisições simultâneas")
+    parser.add_argument("--generation", type=int,
+                        help="importa só as species desta geração (ex.: 1)")
+    parser.add_argument("--ids", type=parse_id_range, dest="id_range",
+                        help="intervalo de ids de species, ex.: 1-151")
+    parser.add_argument("--refresh", action="store_true",
+                        help="reprocessa species já no journal (grava só o que mudou)")
+    parser.add_argument("--render-only", action="store_true",
+                        help="regenera as notas a partir dos dados já baixados, sem rede")
+    parser.add_argument("--profile", action="store_true",
+                        help="roda sob o cProfile e grava as estatísticas junto das métricas")
+    return parser.parse_args()
+
+
+def parse_id_range(text):
+    lo, _, hi = text.partition("-")
+    return int(lo), int(hi or lo)
+
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    session.limiter = RateLimiter(args.rps, max_in_flight=args.max_in_flight)
+    kwargs = dict(workers=args.workers, generation=args.generation,
+                  id_range=args.id_range, refresh=args.refresh, render_only=args.render_only)
+    if args.profile:
+        metrics.profile(VAULT_SOURCE, main, **kwargs)
+    else:
+        main(**kwargs)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Checkpoint append-only compartilhado pelos importadores
+O estado fica em dois arquivos:
+  - snapshot (ex.: checkpoint.json): lista de chaves, ou objeto chave -> valor
+  - log (ex.: checkpoint.log): uma chave por linha, anexada em lotes;
+    linhas "chave\\t<json>" guardam também um valor e "\\tchave" a remove
+Na abertura o snapshot é lido e o log reaplicado por cima; de tempos em
+tempos o log é compactado num snapshot novo (gravado de forma atômica).
+"""
+
+import os
+import json
+import threading
+
+
+class Journal:
+    def __init__(self, path, flush_every=50, compact_every=5000):
+        self.path = path
+        self.log_path = os.path.splitext(path)[0] + ".log"
+        self.flush_every = flush_every
+        self.compact_every = compact_every
+        self.entries = {}
+        self._pending = []
+        self._logged = 0
+        self._lock = threading.Lock()
+        self._replay()
+        self._log = open(self.log_path, "a", encoding="utf-8")
+
+    # ----------------------------------------------------
+    # leitura
+    # ----------------------------------------------------
+    def _replay(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                snap = json.load(f)
+            if isinstance(snap, dict):
+                self.entries.update(snap)
+            else:
+                self.entries.update(dict.fromkeys(snap))
+
+        if os.path.exists(self.log_path):
+            good = 0
+            with open(self.log_path, "rb") as f:
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break  # última linha truncada por uma interrupção
+                    key, sep, value = raw[:-1].decode("utf-8").partition("\t")
+                    if not key:
+                        self.entries.pop(value, None)
+                    else:
+                        self.entries[key] = json.loads(value) if sep else None
+                    self._logged += 1
+                    good += len(raw)
+            if good < os.path.getsize(self.log_path):
+                os.truncate(self.log_path, good)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        return self.entries.get(key, default)
+
+    # ----------------------------------------------------
+    # escrita
+    # ----------------------------------------------------
+    def add(self, key, value=None):
+        line = key if value is None else f"{key}\t{json.dumps(value, ensure_ascii=False)}"
+        with self._lock:
+            self.entries[key] = value
+            self._append_locked(line)
+
+    def discard(self, key):
+        with self._lock:
+            if self.entries.pop(key, False) is not False:
+                self._append_locked(f"\t{key}")
+
+    def _append_locked(self, line):
+        self._pending.append(line + "\n")
+        if len(self._pending) >= self.flush_every:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._pending:
+            self._log.write("".join(self._pending))
+            self._log.flush()
+            self._logged += len(self._pending)
+            self._pending = []
+        if self._logged >= self.compact_every:
+            self._compact_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _compact_locked(self):
+        if all(v is None for v in self.entries.values()):
+            snap = list(self.entries)
+        else:
+            snap = self.entries
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snap, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        # o snapshot já contém tudo: o log pode recomeçar vazio
+        self._log.close()
+        self._log = open(self.log_path, "w", encoding="utf-8")
+        self._logged = 0
+
+    def compact(self):
+        with self._lock:
+            self._pending = []  # já estão em self.entries, vão no snapshot
+            self._compact_locked()
+
+    def close(self):
+        self.compact()
+        self._log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
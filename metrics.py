@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+Métricas de execução compartilhadas pelos importadores
+Cada importador tem um Meter: tempo por etapa (fetch, parse, render,
+write), e por host as requisições de rede, erros, retries, bytes e um
+histograma de latência. No fim da execução export() grava o resumo em
+JSON (e, se IMPORTER_PROM_DIR estiver definido, um textfile no formato
+do Prometheus para o node_exporter). profile() roda o importador sob o
+cProfile, em todas as threads, e grava as estatísticas.
+"""
+
+import os
+import sys
+import time
+import json
+import pstats
+import functools
+import cProfile
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import http_cache
+
+# --------------------------------------------------------
+# CONFIG
+# --------------------------------------------------------
+METRICS_DIR = os.path.join(os.path.dirname(http_cache.CACHE_DIR), "metrics")
+PROM_DIR = os.environ.get("IMPORTER_PROM_DIR")  # textfile collector do node_exporter
+
+# limites (segundos) das faixas do histograma de latência
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+PROFILE_TOP = 25  # funções mostradas no fim de um --profile
+
+
+class Meter:
+    """Contadores de uma execução; seguro entre threads.
+
+    Cada importador tem um meter no nível do módulo, ligado à sua sessão e
+    ao seu BatchWriter; o resumo sai com finish() no fim do main().
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.stages = {}  # etapa -> {"count", "seconds", "max"}
+        self.hosts = {}  # host -> requisições, erros, retries, bytes, latências
+
+    # --------------------------------------------------------
+    # ETAPAS
+    # --------------------------------------------------------
+    def add_stage(self, name, seconds, n=1):
+        """Soma `seconds` gastos em `n` itens na etapa (ex.: tempo medido num processo)."""
+        with self._lock:
+            st = self.stages.setdefault(name, {"count": 0, "seconds": 0.0, "max": 0.0})
+            st["count"] += n
+            st["seconds"] += seconds
+            st["max"] = max(st["max"], seconds / n if n else seconds)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    # --------------------------------------------------------
+    # REDE
+    # --------------------------------------------------------
+    def add_request(self, url, seconds, status=None, nbytes=0, retries=0):
+        """Uma ida à rede; status None é uma exceção (conexão, timeout...)."""
+        host = urlsplit(url).hostname or "?"
+        with self._lock:
+            h = self.hosts.get(host)
+            if h is None:
+                h = self.hosts[host] = {
+                    "requests": 0, "errors": 0, "retries": 0, "bytes": 0,
+                    "seconds": 0.0, "max": 0.0, "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                }
+            h["requests"] += 1
+            h["errors"] += status is None or status >= 400
+            h["retries"] += retries
+            h["bytes"] += nbytes
+            h["seconds"] += seconds
+            h["max"] = max(h["max"], seconds)
+            h["buckets"][sum(seconds > b for b in LATENCY_BUCKETS)] += 1
+
+    # --------------------------------------------------------
+    # RESUMO
+    # --------------------------------------------------------
+    def summary(self, **extra):
+        """Dicionário serializável com tudo o que foi medido, mais `extra`."""
+        with self._lock:
+            stages = {
+                name: {**st, "avg": st["seconds"] / st["count"] if st["count"] else 0.0}
+                for name, st in self.stages.items()
+            }
+            hosts = {}
+            for host, h in self.hosts.items():
+                labels = [str(b) for b in LATENCY_BUCKETS] + ["+Inf"]
+                hosts[host] = {
+                    **{k: h[k] for k in ("requests", "errors", "retries", "bytes", "seconds", "max")},
+                    "avg": h["seconds"] / h["requests"] if h["requests"] else 0.0,
+                    "latency_buckets": dict(zip(labels, h["buckets"])),
+                }
+        finished = time.time()
+        return {
+            "source": self.source,
+            "started": self.started,
+            "finished": finished,
+            "duration": finished - self.started,
+            "stages": stages,
+            "hosts": hosts,
+            **extra,
+        }
+
+    def report_lines(self, summary=None):
+        s = summary or self.summary()
+        lines = []
+        if s["stages"]:
+            lines.append("Etapas: " + ", ".join(
+                f"{name} {st['count']}x {st['avg'] * 1e3:.1f} ms (total {st['seconds']:.1f}s)"
+                for name, st in s["stages"].items()
+            ))
+        for host, h in sorted(s["hosts"].items(), key=lambda kv: -kv[1]["requests"]):
+            lines.append(
+                f"{host}: {h['requests']} req, {h['errors']} erros, {h['retries']} retries, "
+                f"{h['bytes'] / 1e6:.1f} MB, média {h['avg'] * 1e3:.0f} ms, máx {h['max'] * 1e3:.0f} ms"
+            )
+        return lines
+
+    def export(self, **extra):
+        """Grava o resumo (JSON e, opcionalmente, Prometheus); devolve o resumo."""
+        s = self.summary(**extra)
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"{self.source}.json")
+        _atomic_write(path, json.dumps(s, ensure_ascii=False, indent=2))
+        s["path"] = path
+        if PROM_DIR:
+            os.makedirs(PROM_DIR, exist_ok=True)
+            _atomic_write(os.path.join(PROM_DIR, f"importer_{self.source}.prom"), prometheus_text(s))
+        return s
+
+    def finish(self, prefix="[INFO]", **extra):
+        """Fim da execução: exporta e imprime o resumo."""
+        s = self.export(**extra)
+        for line in self.report_lines(s):
+            print(f"{prefix} {line}")
+        print(f"{prefix} Métricas em {s['path']}")
+        return s
+
+
+def _atomic_write(path, text):
+    # o node_exporter pode ler o arquivo a qualquer momento
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def prometheus_text(summary):
+    """Resumo no formato de exposição do Prometheus (textfile collector)."""
+    src = summary["source"]
+    out = [
+        "# TYPE importer_run_duration_seconds gauge",
+        f'importer_run_duration_seconds{{source="{src}"}} {summary["duration"]:.3f}',
+        "# TYPE importer_run_finished_timestamp_seconds gauge",
+        f'importer_run_finished_timestamp_seconds{{source="{src}"}} {summary["finished"]:.0f}',
+        "# TYPE importer_stage_seconds_total counter",
+    ]
+    for name, st in summary["stages"].items():
+        out.append(f'importer_stage_seconds_total{{source="{src}",stage="{name}"}} {st["seconds"]:.6f}')
+    out.append("# TYPE importer_stage_items_total counter")
+    for name, st in summary["stages"].items():
+        out.append(f'importer_stage_items_total{{source="{src}",stage="{name}"}} {st["count"]}')
+
+    for metric, key in (("requests", "requests"), ("request_errors", "errors"),
+                        ("request_retries", "retries"), ("response_bytes", "bytes")):
+        out.append(f"# TYPE importer_{metric}_total counter")
+        for host, h in summary["hosts"].items():
+            out.append(f'importer_{metric}_total{{source="{src}",host="{host}"}} {h[key]}')
+
+    out.append("# TYPE importer_request_duration_seconds histogram")
+    for host, h in summary["hosts"].items():
+        labels = f'source="{src}",host="{host}"'
+        cumulative = 0
+        for le, n in h["latency_buckets"].items():
+            cumulative += n
+            out.append(f'importer_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        out.append(f"importer_request_duration_seconds_sum{{{labels}}} {h['seconds']:.6f}")
+        out.append(f"importer_request_duration_seconds_count{{{labels}}} {h['requests']}")
+    return "\n".join(out) + "\n"
+
+
+# --------------------------------------------------------
+# ETAPAS EM PROCESSOS
+# --------------------------------------------------------
+def _run_timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def timed(fn):
+    """Envolve a função de uma etapa para devolver (segundos, resultado).
+
+    Serve para medir o que roda num pool de processos: o tempo é medido no
+    worker e somado ao Meter no processo principal.
+    """
+    return functools.partial(_run_timed, fn)
+
+
+# --------------------------------------------------------
+# --profile
+# --------------------------------------------------------
+def profile(source, fn, *args, **kwargs):
+    """Roda fn(*args, **kwargs) sob o cProfile e grava METRICS_DIR/<fonte>.prof.
+
+    No Python 3.12+ um só profiler já cobre todas as threads; antes disso
+    cada thread criada durante a execução ganha o seu e as estatísticas são
+    somadas no fim. Workers de processo não entram (o tempo deles aparece
+    nas etapas do Meter).
+    """
+    profilers = [cProfile.Profile()]
+    lock = threading.Lock()
+    per_thread = sys.version_info < (3, 12)  # no 3.12+ um segundo profiler dá ValueError
+
+    def start_thread_profiler(*_):
+        p = cProfile.Profile()
+        with lock:
+            profilers.append(p)
+        p.enable()  # substitui este hook na thread
+
+    if per_thread:
+        threading.setprofile(start_thread_profiler)
+    profilers[0].enable()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profilers[0].disable()
+        if per_thread:
+            threading.setprofile(None)
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"{source}.prof")
+        with lock:
+            for p in profilers:
+                p.create_stats()
+            stats = pstats.Stats(*[p for p in profilers if p.stats])
+        stats.dump_stats(path)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+        print(f"[INFO] Profile salvo em {path} (abra com python -m pstats)")
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Utilidades de execução concorrente compartilhadas pelos importadores
+"""
+
+import importlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
+
+
+def bounded_map(executor, fn, items, max_in_flight, *args):
+    """Como executor.map, mas com no máximo `max_in_flight` tarefas pendentes.
+
+    `items` é consumido sob demanda (pode ser um gerador), então a memória
+    não cresce com o tamanho da entrada. Os resultados saem na ordem em que
+    as tarefas terminam.
+    """
+    pending = set()
+    for item in items:
+        if len(pending) >= max_in_flight:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        pending.add(executor.submit(fn, item, *args))
+
+    for future in as_completed(pending):
+        yield future.result()
+
+
+def staged_map(fetch_pool, process_pool, fetch, process, items, max_in_flight, max_queued, *args):
+    """Duas etapas: `fetch` (rede, em threads) e `process` (CPU, em processos).
+
+    `fetch(item, *args)` devolve a tupla de argumentos de `process`, ou None
+    para pular o item (o erro já foi reportado). Entre as etapas ficam no
+    máximo `max_queued` tarefas; com a etapa de processos cheia, novos
+    downloads esperam. Os resultados saem na ordem em que terminam.
+    """
+    pending = set()
+    for fetched in bounded_map(fetch_pool, fetch, items, max_in_flight, *args):
+        if fetched is None:
+            continue
+        if len(pending) >= max_queued:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        pending.add(process_pool.submit(process, *fetched))
+
+    for future in as_completed(pending):
+        yield future.result()
+
+
+# --------------------------------------------------------
+# POOL DE PROCESSOS
+# --------------------------------------------------------
+def _apply_settings(settings):
+    for name, value in settings.items():
+        module, attr = name.rsplit(".", 1)
+        setattr(importlib.import_module(module), attr, value)
+
+
+def process_pool(max_workers, settings=None):
+    """ProcessPoolExecutor (spawn, igual em Windows e Linux) para parse/render.
+
+    Os workers importam os módulos do zero, então configurações mudadas em
+    tempo de execução no processo principal (ex.: --parser) precisam vir em
+    `settings`, como {"html_parsing.HTML_PARSER": "lxml"}.
+    """
+    return ProcessPoolExecutor(
+        max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_apply_settings,
+        initargs=(settings or {},),
+    )
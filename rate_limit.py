@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Limitador de taxa compartilhado (token bucket + teto de requisições simultâneas)
+Substitui os time.sleep fixos entre requisições: cada requisição de rede
+consome um token; os tokens são repostos a `rate` por segundo até `burst`.
+"""
+
+import time
+import threading
+from urllib.parse import urlparse
+
+
+class RateLimiter:
+    def __init__(self, rate, burst=None, max_in_flight=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+
+    def acquire(self):
+        """Bloqueia até haver um token disponível."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def __enter__(self):
+        if self._slots:
+            self._slots.acquire()
+        try:
+            self.acquire()
+        except BaseException:
+            if self._slots:
+                self._slots.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        if self._slots:
+            self._slots.release()
+        return False
+
+
+class HostBudgets:
+    """Um RateLimiter por host, para sessões que falam com vários sites.
+
+    `budgets` mapeia domínio -> (rate, max_in_flight) e vale também para os
+    subdomínios (goodreads.com cobre www.goodreads.com). Hosts sem entrada
+    usam `default` (None = sem limite). Pode ser passado como `limiter` de
+    http_cache.CachedSession e compartilhado entre várias sessões.
+    """
+
+    def __init__(self, budgets, default=None):
+        self.limiters = {
+            host: RateLimiter(rate, max_in_flight=max_in_flight)
+            for host, (rate, max_in_flight) in budgets.items()
+        }
+        self.default = RateLimiter(default[0], max_in_flight=default[1]) if default else None
+        self.requests = {}  # domínio do orçamento -> requisições à rede
+        self._lock = threading.Lock()
+
+    def budget_for(self, host):
+        while host:
+            if host in self.limiters:
+                return host
+            host = host.partition(".")[2]
+        return "*"
+
+    def for_url(self, url):
+        budget = self.budget_for(urlparse(url).hostname or "")
+        with self._lock:
+            self.requests[budget] = self.requests.get(budget, 0) + 1
+        return self.limiters.get(budget, self.default)
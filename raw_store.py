@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Armazém dos dados brutos de cada fonte (SQLite, um arquivo por fonte)
+Guarda, por entidade, o que foi baixado e é preciso para renderizar a nota
+(JSON da API, HTML da página...), comprimido com zlib. Com isso o
+--render-only dos importadores regenera todas as notas sem rede: mudar uma
+chave do frontmatter não exige baixar tudo de novo.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+
+import http_cache
+import metrics
+import vault_writer
+from pipeline import bounded_map, process_pool
+
+# --------------------------------------------------------
+# CONFIG
+# --------------------------------------------------------
+RAW_DIR = os.path.join(os.path.dirname(http_cache.CACHE_DIR), "raw")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS payloads (
+    key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,  -- JSON comprimido com zlib
+    fetched_at REAL NOT NULL
+)
+"""
+
+
+def _encode(payload):
+    return zlib.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+
+def decode(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class RawStore:
+    """Pares chave -> payload JSON de uma fonte; seguro entre threads.
+
+    As gravações ficam pendentes e são confirmadas a cada `commit_every`
+    (e no close), para não pagar um commit por entidade.
+    """
+
+    def __init__(self, source, raw_dir=RAW_DIR, commit_every=200):
+        os.makedirs(raw_dir, exist_ok=True)
+        self.path = os.path.join(raw_dir, f"{source}.sqlite")
+        self.commit_every = commit_every
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(SCHEMA)
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+
+    def put(self, key, payload):
+        blob = _encode(payload)
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO payloads VALUES (?, ?, ?)", (str(key), blob, time.time()))
+            self._uncommitted += 1
+            if self._uncommitted >= self.commit_every:
+                self.db.commit()
+                self._uncommitted = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self.db.execute("SELECT payload FROM payloads WHERE key = ?", (str(key),)).fetchone()
+        return decode(row[0]) if row else default
+
+    def __len__(self):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM payloads").fetchone()[0]
+
+    def chunks(self, size=100):
+        """Payloads ainda comprimidos, em listas de até `size`.
+
+        Feito para mandar a workers de processo sem carregar tudo de uma
+        vez; cada worker abre os seus com raw_store.decode.
+        """
+        with self._lock:
+            self.db.commit()
+            keys = [r[0] for r in self.db.execute("SELECT key FROM payloads ORDER BY key")]
+        for i in range(0, len(keys), size):
+            chunk = keys[i:i + size]
+            with self._lock:
+                rows = self.db.execute(
+                    f"SELECT payload FROM payloads WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+            yield [r[0] for r in rows]
+
+    def close(self):
+        with self._lock:
+            self.db.commit()
+            self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# --------------------------------------------------------
+# --render-only
+# --------------------------------------------------------
+def render_all(source, render, save, workers, settings=None, chunk=100, meter=None, prefix="[INFO]"):
+    """Regenera todas as notas de `source` a partir do armazém, sem rede.
+
+    `render(blobs)` roda num pool de processos (`settings` como em
+    pipeline.process_pool) e devolve uma lista de itens; `save(writer, item)`
+    entrega cada item ao BatchWriter no processo principal. Devolve o
+    writer, já fechado, para o resumo.
+    """
+    with RawStore(source) as store, vault_writer.BatchWriter(meter=meter) as writer, \
+            process_pool(workers, settings) as pool:
+        print(f"{prefix} Render-only: {len(store)} registros guardados de {source}")
+        for seconds, rendered in bounded_map(pool, metrics.timed(render), store.chunks(chunk), workers * 2):
+            if meter is not None:
+                meter.add_stage("render", seconds, len(rendered))
+            for item in rendered:
+                save(writer, item)
+    return writer
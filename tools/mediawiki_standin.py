@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Stand-in local do api.php do MediaWiki para testar dragons.py --api
+Serve respostas gravadas do wiki real: cada arquivo .json da pasta é uma
+resposta de action=query (formato padrão), por exemplo
+
+  curl -o gravacoes/lote1.json "https://howtotrainyourdragon.fandom.com/api.php?action=query&format=json&prop=revisions|pageimages&rvprop=content&rvslots=main&piprop=original&redirects=1&titles=Night_Fury|Deadly_Nadder"
+
+As páginas de todos os arquivos são indexadas por título e qualquer
+combinação de títulos pedida é respondida a partir delas (títulos
+desconhecidos voltam como "missing"), com os mesmos normalized/redirects.
+
+Uso: python tools/mediawiki_standin.py PASTA [--port 8770]
+     python dragons.py --api --api-url http://127.0.0.1:8770/api.php
+"""
+
+import os
+import glob
+import json
+import argparse
+import http.server
+from urllib.parse import urlparse, parse_qs
+
+
+def load_recordings(folder):
+    pages, aliases = {}, {}
+    for path in sorted(glob.glob(os.path.join(folder, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            query = json.load(f).get("query", {})
+        for page in query.get("pages", {}).values():
+            if "missing" not in page:
+                pages[page["title"]] = page
+        for kind in ("normalized", "redirects"):
+            for step in query.get(kind, []):
+                aliases[step["from"]] = (kind, step["to"])
+    return pages, aliases
+
+
+def answer(titles, pages, aliases):
+    query = {"normalized": [], "redirects": [], "pages": {}}
+    missing_id = -1
+    for title in titles:
+        # segue normalização e redirecionamentos como o MediaWiki faz
+        while title in aliases:
+            kind, target = aliases[title]
+            query[kind].append({"from": title, "to": target})
+            title = target
+        page = pages.get(title)
+        if page is None:
+            page = {"ns": 0, "title": title, "missing": ""}
+            query["pages"][str(missing_id)] = page
+            missing_id -= 1
+        else:
+            query["pages"][str(page.get("pageid", title))] = page
+    return {"batchcomplete": "", "query": {k: v for k, v in query.items() if v}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("folder", help="pasta com respostas .json gravadas")
+    parser.add_argument("--port", type=int, default=8770)
+    args = parser.parse_args()
+
+    pages, aliases = load_recordings(args.folder)
+    print(f"[INFO] {len(pages)} páginas gravadas, {len(aliases)} aliases.")
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            if not url.path.endswith("api.php") or params.get("action") != ["query"]:
+                self.send_error(400, "só action=query é suportado")
+                return
+            titles = [t for t in params.get("titles", [""])[0].split("|") if t]
+            body = json.dumps(answer(titles, pages, aliases)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *a):
+            print(f"[INFO] {self.address_string()} {fmt % a}")
+
+    print(f"[INFO] Servindo em http://127.0.0.1:{args.port}/api.php")
+    http.server.ThreadingHTTPServer(("127.0.0.1", args.port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Índice do estado do vault (SQLite) compartilhado pelos importadores
+Percorre a pasta de saída de cada fonte com os.scandir e guarda, por nota,
+o id e o título do frontmatter, o hash do conteúdo, mtime e tamanho. Notas
+com mtime/tamanho iguais aos do índice nem são abertas, então reescanear
+o vault inteiro leva milissegundos; cada importador calcula o que falta a
+partir do que realmente existe (e não de um checkpoint que pode divergir
+quando notas são apagadas ou editadas).
+
+Uso: python vault_index.py [--only FONTE] [--dry-run]
+     mostra as notas adicionadas/alteradas/removidas desde o último scan
+"""
+
+import os
+import re
+import sqlite3
+import argparse
+import importlib
+import threading
+
+import yaml
+
+import http_cache
+import vault_writer
+
+# --------------------------------------------------------
+# CONFIG
+# --------------------------------------------------------
+DB_PATH = os.path.join(os.path.dirname(http_cache.CACHE_DIR), "vault_index.sqlite")
+
+# fonte -> (chave do id, chave do título) no frontmatter
+SOURCE_KEYS = {
+    "pokemon": ("dex_id", "name"),
+    "birds": ("id", "name_en"),
+    "books": ("id", "title"),
+    "dragons": (None, "title"),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    source TEXT NOT NULL,
+    path TEXT NOT NULL,  -- relativo à pasta da fonte
+    entity_id TEXT,
+    title TEXT,
+    hash TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (source, path)
+)
+"""
+
+_TOP_KEY = re.compile(r"^([^\s#][^:]*):")
+
+try:
+    _Loader = yaml.CSafeLoader
+except AttributeError:  # PyYAML sem libyaml
+    _Loader = yaml.SafeLoader
+
+
+# --------------------------------------------------------
+# LEITURA DAS NOTAS
+# --------------------------------------------------------
+def iter_notes(folder):
+    """(caminho relativo, DirEntry) de cada .md, recursivo, sem pastas ocultas."""
+    stack = [""]
+    while stack:
+        rel = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(folder, rel))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(os.path.join(rel, entry.name))
+                elif entry.name.endswith(".md"):
+                    yield os.path.join(rel, entry.name), entry
+
+
+def frontmatter_fields(text, keys):
+    """Valores das chaves de topo `keys` do frontmatter, sem carregar o YAML todo.
+
+    Só os blocos dessas chaves (a linha e as indentadas abaixo) passam pelo
+    parser; um título em formato de dicionário ({Título: null}) vira a chave.
+    """
+    if not text.startswith("---\n"):
+        return {}
+    end = text.find("\n---\n", 3)
+    lines = text[4:end if end != -1 else len(text)].split("\n")
+
+    blocks, current = {}, None
+    for line in lines:
+        m = _TOP_KEY.match(line)
+        if m:
+            current = m.group(1) if m.group(1) in keys else None
+            if current:
+                blocks[current] = [line]
+        elif current and line.startswith((" ", "-")):
+            blocks[current].append(line)
+
+    fields = {}
+    for key, block in blocks.items():
+        try:
+            value = (yaml.load("\n".join(block), Loader=_Loader) or {}).get(key)
+        except yaml.YAMLError:
+            continue
+        if isinstance(value, dict):
+            value = next(iter(value), None)
+        if value is not None:
+            fields[key] = str(value)
+    return fields
+
+
+# --------------------------------------------------------
+# ÍNDICE
+# --------------------------------------------------------
+class VaultIndex:
+    def __init__(self, db_path=DB_PATH):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute(SCHEMA)
+        self._lock = threading.Lock()
+
+    def scan(self, source, folder, dry_run=False):
+        """Atualiza o índice da fonte com o que existe em `folder`.
+
+        Devolve {"added", "changed", "removed": [(id, título, path)],
+        "unchanged": n}; com dry_run o índice não é alterado.
+        """
+        id_key, title_key = SOURCE_KEYS.get(source, ("id", "title"))
+        with self._lock:
+            known = {
+                path: (entity_id, title, hash_, mtime, size)
+                for path, entity_id, title, hash_, mtime, size in self.db.execute(
+                    "SELECT path, entity_id, title, hash, mtime, size FROM notes WHERE source = ?", (source,))
+            }
+
+        report = {"added": [], "changed": [], "removed": [], "unchanged": 0}
+        rows = []
+        for path, entry in iter_notes(folder):
+            st = entry.stat()
+            old = known.pop(path, None)
+            if old and old[3] == st.st_mtime and old[4] == st.st_size:
+                report["unchanged"] += 1
+                continue
+
+            # uma nota que não é UTF-8 não pode derrubar o scan inteiro
+            with open(entry.path, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+            hash_ = vault_writer.content_hash(text)
+            if old and old[2] == hash_:
+                # só o mtime mudou (ex.: gravado de novo igual)
+                rows.append((source, path, old[0], old[1], hash_, st.st_mtime, st.st_size))
+                report["unchanged"] += 1
+                continue
+
+            fields = frontmatter_fields(text, {id_key, title_key} - {None})
+            title = fields.get(title_key) or os.path.splitext(os.path.basename(path))[0]
+            entity_id = fields.get(id_key) if id_key else title
+            rows.append((source, path, entity_id, title, hash_, st.st_mtime, st.st_size))
+            report["changed" if old else "added"].append((entity_id, title, path))
+
+        report["removed"] = [(e, t, path) for path, (e, t, *_rest) in known.items()]
+
+        if not dry_run:
+            with self._lock, self.db:
+                self.db.executemany("INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self.db.executemany("DELETE FROM notes WHERE source = ? AND path = ?",
+                                    [(source, path) for path in known])
+        return report
+
+    def _column(self, source, column):
+        with self._lock:
+            return {r[0] for r in self.db.execute(
+                f"SELECT {column} FROM notes WHERE source = ? AND {column} IS NOT NULL", (source,))}
+
+    def ids(self, source):
+        return self._column(source, "entity_id")
+
+    def titles(self, source):
+        return self._column(source, "title")
+
+    def hashes(self, source):
+        """{path relativo: hash} das notas da fonte."""
+        with self._lock:
+            return dict(self.db.execute("SELECT path, hash FROM notes WHERE source = ?", (source,)))
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def scan_summary(report):
+    return (f"{len(report['added'])} adicionadas, {len(report['changed'])} alteradas, "
+            f"{len(report['removed'])} removidas desde o último scan, {report['unchanged']} iguais")
+
+
+# --------------------------------------------------------
+# CLI: relatório do que mudou no vault
+# --------------------------------------------------------
+def main(sources, dry_run=False):
+    from import_all import SOURCES  # pastas de saída de cada importador
+
+    with VaultIndex() as index:
+        for source in sources:
+            module, folder_attr = SOURCES[source]
+            folder = getattr(importlib.import_module(module), folder_attr)
+            report = index.scan(source, folder, dry_run=dry_run)
+            print(f"[INFO] {source}: {scan_summary(report)}")
+            for kind in ("added", "changed", "removed"):
+                for entity_id, title, path in report[kind]:
+                    print(f"  {kind:<8} {title} ({entity_id}) — {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Índice do estado do vault")
+    parser.add_argument("--only", action="append", dest="sources", choices=list(SOURCE_KEYS),
+                        help="escaneia só esta fonte; pode repetir (padrão: todas)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="só mostra o que mudou, sem atualizar o índice")
+    args = parser.parse_args()
+    args.sources = args.sources or list(SOURCE_KEYS)
+    return args
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
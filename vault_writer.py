@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Serialização das notas (YAML frontmatter + corpo Markdown) compartilhada
+pelos importadores.
+Usa o emissor em C da libyaml quando disponível, com saída byte a byte
+igual à de yaml.safe_dump(..., sort_keys=False, allow_unicode=True).
+As gravações são atômicas (arquivo temporário + rename) e, pelo
+BatchWriter, feitas numa thread própria e só quando o conteúdo mudou, para
+que notas iguais mantenham o mtime e o Obsidian não reindexe tudo.
+"""
+
+import os
+import re
+import time
+import queue
+import hashlib
+import threading
+import yaml
+
+try:
+    from yaml import CSafeDumper as FastDumper
+except ImportError:  # PyYAML sem libyaml
+    FastDumper = yaml.SafeDumper
+
+# Os dois emissores só concordam byte a byte enquanto nenhuma string precisa
+# de aspas duplas (a libyaml dobra linhas longas entre aspas duplas sem o
+# "\" de continuação) e não há caractere fora do BMP ou NEL (a libyaml os
+# escapa mesmo com allow_unicode=True). Aspas duplas vêm de caracteres não
+# imprimíveis (inclui tab e \r), BOM, quebras de linha Unicode, espaço
+# colado a uma quebra de linha e chaves com mais de uma linha; nesses
+# documentos usamos o emissor em Python.
+_PY_ONLY = re.compile("[^\n\x20-\x7e\xa0-\ud7ff\ue000-\ufffd]|[\ufeff\u2028\u2029]| \n|\n ")
+
+
+def _needs_python_emitter(obj, key=False):
+    if isinstance(obj, str):
+        return bool(_PY_ONLY.search(obj)) or (key and "\n" in obj)
+    if isinstance(obj, dict):
+        return any(_needs_python_emitter(k, key=True) or _needs_python_emitter(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return any(_needs_python_emitter(v) for v in obj)
+    return False
+
+
+def _dumper_for(yaml_obj):
+    if FastDumper is yaml.SafeDumper:
+        return FastDumper
+    return yaml.SafeDumper if _needs_python_emitter(yaml_obj) else FastDumper
+
+
+def dump_frontmatter(yaml_obj):
+    """Como yaml.safe_dump."""
+    return yaml.dump(
+        yaml_obj, Dumper=_dumper_for(yaml_obj),
+        sort_keys=False, allow_unicode=True,
+    )
+
+
+def render_md(yaml_obj, body_md=""):
+    return "---\n" + dump_frontmatter(yaml_obj) + "---\n\n" + body_md
+
+
+def _tmp_path(path):
+    return f"{path}.{threading.get_ident()}.tmp"
+
+
+# --------------------------------------------------------
+# GRAVAÇÃO SÓ QUANDO MUDA
+# --------------------------------------------------------
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def file_hash(path):
+    """Hash do texto atual de `path`, ou None se não existe."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return content_hash(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def write_if_changed(path, text, old_hash=None):
+    """Grava `text` em `path` (temp + rename) só se difere do que está lá.
+
+    `old_hash`, se conhecido (ex.: de um checkpoint), evita reler o arquivo.
+    Devolve True se gravou.
+    """
+    if old_hash is None:
+        old_hash = file_hash(path)
+    if content_hash(text) == old_hash and os.path.exists(path):
+        return False
+    tmp = _tmp_path(path)
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+    return True
+
+
+class BatchWriter:
+    """Thread dedicada às gravações do vault.
+
+    submit() só enfileira (bloqueia se houver `max_queued` grupos na fila),
+    então os workers de rede não esperam pelo disco; a thread grava o que
+    estiver na fila em lotes de até `batch_size` grupos. Um grupo é uma ou
+    mais notas (path, texto, hash antigo) cujo `on_done(gravadas)` só é
+    chamado, na thread do writer, se todas foram conferidas/gravadas sem
+    erro; gravadas é a lista de booleanos de write_if_changed. Com um
+    `meter` (metrics.Meter), o tempo de cada grupo entra na etapa "write".
+    Itens que falharam antes de chegar aqui (parse/render) entram no resumo
+    por add_error().
+    """
+
+    def __init__(self, batch_size=64, max_queued=1024, meter=None):
+        self.batch_size = batch_size
+        self.meter = meter
+        self.stats = {"written": 0, "unchanged": 0, "errors": 0, "seconds": 0.0}
+        self._stats_lock = threading.Lock()  # add_error() vem de outra thread
+        self._queue = queue.Queue(max_queued)
+        self._thread = threading.Thread(target=self._run, name="vault-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, path, text, old_hash=None, on_done=None):
+        self.submit_many([(path, text, old_hash)], on_done)
+
+    def submit_many(self, notes, on_done=None):
+        self._put((list(notes), on_done))
+
+    def add_error(self, name, error):
+        """Imprime e conta um item que não chegou a virar nota."""
+        print(f"[ERRO] {name}: {error}")
+        self._count("errors")
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _put(self, item):
+        # com a fila cheia, não espera para sempre por uma thread que já morreu
+        while True:
+            if not self._thread.is_alive():
+                raise RuntimeError("a thread vault-writer não está mais rodando")
+            try:
+                self._queue.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def _write_group(self, notes, on_done):
+        start = time.perf_counter()
+        results = []
+        failed = False
+        for path, text, old_hash in notes:
+            try:
+                written = write_if_changed(path, text, old_hash)
+            except Exception as e:  # ex.: nota existente que não é UTF-8
+                print(f"[ERRO] Gravando nota {path}: {e!r}")
+                self._count("errors")
+                failed = True
+                continue
+            results.append(written)
+            self._count("written" if written else "unchanged")
+        elapsed = time.perf_counter() - start
+        self.stats["seconds"] += elapsed
+        if self.meter is not None:
+            self.meter.add_stage("write", elapsed, len(notes))
+        if failed:
+            return
+        if on_done is not None:
+            try:
+                on_done(results)
+            except Exception as e:
+                print(f"[ERRO] Após gravar {notes[0][0]}: {e}")
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for item in batch:
+                if item is None:  # close()
+                    return
+                try:
+                    self._write_group(*item)
+                except Exception as e:  # a thread não pode morrer com a fila cheia
+                    print(f"[ERRO] Writer: {e!r}")
+                    self._count("errors")
+
+    def close(self):
+        """Espera a fila esvaziar e encerra a thread."""
+        self._put(None)
+        self._thread.join()
+
+    def summary(self):
+        s = self.stats
+        return f"{s['written']} gravadas, {s['unchanged']} sem mudanças, {s['errors']} com erro"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False